@@ -1,27 +1,56 @@
 import os
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from flask import Flask, request, jsonify, render_template
 from flask_cors import CORS
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from werkzeug.security import check_password_hash
-from models import db, User, Room, Tenant, Payment, Complaint
-import threading
-import time
-import smtplib
-from email.message import EmailMessage
+from werkzeug.utils import secure_filename
+from sqlalchemy import case, func, insert, literal, null, select, union_all
+from sqlalchemy.exc import IntegrityError
+from models import db, User, Room, Tenant, Payment, Complaint, EmailOutbox, ScheduledJob
+from db_config import database_uri, engine_options, display_uri, register_sqlite_pragmas
+from importer import (RowError, clean_bool, clean_date, clean_int, clean_text,
+                      detect_format, iter_records, run_import)
+from exporter import export_response
+from versioning import conditional_get, register_table_versioning
+from compression import register_compression
+from json_provider import FastJSONProvider
+from metrics import register_metrics, register_query_metrics
+from slow_queries import register_slow_query_log, slow_query_log, slow_query_threshold_ms
+from qr import QR_MAX_AGE_SECONDS, QR_MIMETYPES, render_qr
+from receipts import iter_receipts_zip, receipt_filename, receipt_pdf
+from auth import load_session_user, session_user
+from passwords import (PasswordHasherBusy, dummy_verify, hash_password, needs_rehash,
+                       verify_password, calibrate as calibrate_password_hashing)
+from mailer import (send_email_smtp, queue_emails, send_due_batch,
+                    outbox_counts, start_outbox_sender)
+from scheduler import JOBS, JobFailed, register_job, run_job, start_scheduler
 
 app = Flask(__name__, template_folder='templates', static_folder='static')
-CORS(app, supports_credentials=True)
+CORS(app, supports_credentials=True, expose_headers=['X-Next-Cursor', 'ETag'])
 app.config['SECRET_KEY'] = 'change_this_secret'
+app.json = FastJSONProvider(app)
+register_metrics(app)
+register_compression(app)
 
-# Use absolute path for database
+# Benchmark the password hash cost while the app is created (also under a WSGI
+# server), rather than on the first login. PASSWORD_HASH_N skips it.
+calibrate_password_hashing()
+
+# Use absolute path for database; DATABASE_URL overrides it (see db_config.py)
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database.db')
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{DB_PATH}'
+DATABASE_URI = database_uri(DB_PATH)
+app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URI
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(DATABASE_URI)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-print(f"Using database: {DB_PATH}")
+print(f"Using database: {display_uri(DATABASE_URI)}")
 
 db.init_app(app)
+with app.app_context():
+    register_sqlite_pragmas(db.engine)
+    register_table_versioning(db.engine)
+    register_query_metrics(db.engine)
+    register_slow_query_log(db.engine)
 
 login_manager = LoginManager(app)
 login_manager.login_view = None  # Disable automatic redirect for JSON APIs
@@ -65,7 +94,8 @@ def init_db_endpoint():
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Served from the signed session and a TTL cache; see auth.py
+    return load_session_user(user_id)
 
 # Sample data initialization
 def init_sample_data():
@@ -73,12 +103,12 @@ def init_sample_data():
     try:
         # Create default admin user if doesn't exist
         if User.query.filter_by(email='admin@pg.com').first() is None:
-            admin = User(email='admin@pg.com', password='admin123', role='ADMIN')
+            admin = User(email='admin@pg.com', password=hash_password('admin123'), role='ADMIN')
             db.session.add(admin)
 
         # Create default tenant user if doesn't exist
         if User.query.filter_by(email='tenant@pg.com').first() is None:
-            tenant_user = User(email='tenant@pg.com', password='tenant123', role='TENANT')
+            tenant_user = User(email='tenant@pg.com', password=hash_password('tenant123'), role='TENANT')
             db.session.add(tenant_user)
 
         # Create default rooms if don't exist
@@ -98,70 +128,288 @@ def init_sample_data():
         print(f"Error initializing sample data: {e}")
         db.session.rollback()
 
+# ---------------- LIST HELPERS ----------------
+
+# Upper bound for ?limit= on the list endpoints
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '500'))
+# Page size of GET /payments and GET /complaints when no ?limit= is given; both
+# tables only ever grow
+DEFAULT_PAGE_SIZE = min(MAX_PAGE_SIZE, 100)
+
+def parse_list_args(allowed_fields):
+    """Parse the ?limit=&after=&fields= arguments shared by the list endpoints.
+
+    Returns (limit, after, fields). limit and after are None when not given, and
+    fields defaults to every allowed field. Raises ValueError on bad input.
+    """
+    limit = request.args.get('limit')
+    after = request.args.get('after')
+    try:
+        limit = int(limit) if limit not in (None, '') else None
+        after = int(after) if after not in (None, '') else None
+    except ValueError:
+        raise ValueError("limit and after must be integers")
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    fields = request.args.get('fields')
+    if not fields:
+        return limit, after, list(allowed_fields)
+    fields = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in allowed_fields]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return limit, after, fields
+
+def select_fields(fields, spec, model):
+    """Core SELECT of the requested fields, labelled by name, plus model.id last
+    (as "_cursor") for pagination. Rows come back as plain tuples, no ORM objects."""
+    return select(*[spec[f][0].label(f) for f in fields], model.id.label('_cursor'))
+
+def joins_needed(fields, spec, model):
+    """True if any requested field reads from model's table (so it must be joined)."""
+    return any(model.__table__ in select(spec[f][0]).get_final_froms() for f in fields)
+
+def paginate(stmt, model, limit, after, descending=False):
+    """Keyset pagination on the primary key (WHERE id > after ORDER BY id LIMIT n).
+    With descending=True pages run newest first (WHERE id < after ORDER BY id DESC).
+    Returns (rows, next_cursor); next_cursor is None on the last page."""
+    if descending:
+        stmt = stmt.order_by(model.id.desc())
+        if after is not None:
+            stmt = stmt.where(model.id < after)
+    else:
+        stmt = stmt.order_by(model.id)
+        if after is not None:
+            stmt = stmt.where(model.id > after)
+    if limit is None:
+        return db.session.execute(stmt).all(), None
+    rows = db.session.execute(stmt.limit(limit + 1)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1]._cursor
+    return rows, None
+
+def project(rows, fields, spec):
+    """Turn rows from select_fields() into dicts, applying the spec's converters.
+    Dates are left as date objects; the JSON provider encodes them."""
+    # zip() stops at the last field, so the trailing _cursor column is dropped
+    items = [dict(zip(fields, row)) for row in rows]
+    for f in fields:
+        convert = spec[f][1]
+        if convert is not None:
+            for item in items:
+                item[f] = convert(item[f])
+    return items
+
+def list_response(items, next_cursor):
+    """JSON array response; the cursor for the next page goes in X-Next-Cursor."""
+    resp = jsonify(items)
+    if next_cursor is not None:
+        resp.headers['X-Next-Cursor'] = str(next_cursor)
+    return resp
+
+def joined_or(default, key, value):
+    """value from an outer-joined table, or default when no row was joined (key is NULL)."""
+    return case((key.is_(None), literal(default)), else_=value)
+
+def payment_status(paid):
+    return case((paid, literal("PAID")), else_=literal("PENDING"))
+
+def na_if_empty(value):
+    return value if value else "N/A"
+
+# Field specs for the list endpoints: name -> (SQL expression, converter or None).
+# The expression is selected as is; the converter, if any, post-processes its value.
+USER_FIELDS = {
+    "id": (User.id, None),
+    "email": (User.email, None),
+    "role": (User.role, None),
+}
+
+ROOM_FIELDS = {
+    "id": (Room.id, None),
+    "room_no": (Room.room_no, None),
+    "room_type": (Room.room_type, None),
+    "rent": (Room.rent, None),
+    "status": (Room.status, None),
+}
+
+TENANT_PAYMENT_FIELDS = {
+    "id": (Payment.id, None),
+    "month": (Payment.month, None),
+    "amount": (Payment.amount, None),
+    "paid": (Payment.paid, None),
+    "status": (payment_status(Payment.paid), None),
+}
+
+def lease_end_date(join_date):
+    """Lease end date (join_date + LEASE_LENGTH_DAYS), or "N/A"."""
+    lease_days = int(os.getenv('LEASE_LENGTH_DAYS', '30'))
+    try:
+        if join_date:
+            return join_date + timedelta(days=lease_days)
+    except Exception:
+        pass
+    return "N/A"
+
+def tenant_end_date(t):
+    """Lease end date of tenant t as a string, or "N/A"."""
+    return str(lease_end_date(t.join_date))
+
+TENANT_FIELDS = {
+    "id": (Tenant.id, None),
+    "user_id": (Tenant.user_id, None),
+    "name": (Tenant.name, None),
+    "email": (joined_or("N/A", User.id, User.email), None),
+    "phone": (Tenant.phone, None),
+    "room_id": (Tenant.room_id, None),
+    "room_no": (joined_or("N/A", Room.id, Room.room_no), None),
+    "room_type": (joined_or("N/A", Room.id, Room.room_type), None),
+    "rent": (joined_or(0, Room.id, Room.rent), None),
+    "join_date": (Tenant.join_date, na_if_empty),
+    "end_date": (Tenant.join_date, lease_end_date),
+    # Personal info, exposed to admins only
+    "address": (Tenant.address, None),
+    "id_info": (Tenant.id_info, None),
+}
+TENANT_ADMIN_ONLY_FIELDS = ("address", "id_info")
+
+PAYMENT_FIELDS = {
+    "id": (Payment.id, None),
+    "tenant_id": (Payment.tenant_id, None),
+    "month": (Payment.month, None),
+    "amount": (Payment.amount, None),
+    "paid": (Payment.paid, None),
+    "status": (payment_status(Payment.paid), None),
+    "due_date": (Payment.due_date, None),
+    "tenant_name": (joined_or("N/A", Tenant.id, Tenant.name), None),
+    "tenant_phone": (joined_or("N/A", Tenant.id, Tenant.phone), None),
+    "tenant_email": (joined_or("N/A", User.id, User.email), None),
+    "room_no": (joined_or("N/A", Room.id, Room.room_no), None),
+    "room_type": (joined_or("N/A", Room.id, Room.room_type), None),
+}
+
+COMPLAINT_FIELDS = {
+    "id": (Complaint.id, None),
+    "tenant_id": (Complaint.tenant_id, None),
+    "tenant_name": (joined_or("N/A", Tenant.id, Tenant.name), None),
+    "category": (Complaint.category, None),
+    "description": (Complaint.description, None),
+    "status": (Complaint.status, None),
+}
+
+def parse_bool_arg(name):
+    """Parse an optional true/false query argument. Raises ValueError on bad input."""
+    value = request.args.get(name)
+    if value in (None, ''):
+        return None
+    value = value.lower()
+    if value in ('true', '1', 'yes'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"{name} must be true or false")
+
+def parse_int_arg(name):
+    """Parse an optional integer query argument. Raises ValueError on bad input."""
+    value = request.args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+
+def parse_date_arg(name):
+    """Parse an optional YYYY-MM-DD query argument. Raises ValueError on bad input."""
+    value = request.args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"{name} must be a date in YYYY-MM-DD format")
+
 # ---------------- AUTH ----------------
 
+def claim_room(room_id):
+    """Atomically mark an Available room as Occupied in the current transaction.
+
+    Uses UPDATE ... WHERE status = 'Available' so that of two concurrent claims
+    only one matches a row. Returns True if this call got the room.
+    """
+    claimed = Room.query.filter_by(id=room_id, status="Available").update(
+        {"status": "Occupied"}, synchronize_session=False
+    )
+    return claimed == 1
+
 @app.route("/register", methods=["POST"])
 def register():
     data = request.json
+    email = data["email"].lower()
+    role = data.get("role", "TENANT")
+    password = data.get("password")
+    if not isinstance(password, str) or not password:
+        return {"message": "Password is required"}, 400
 
     # Check if user already exists
-    existing_user = User.query.filter_by(email=data["email"]).first()
+    existing_user = User.query.filter_by(email=email).first()
     if existing_user:
         return {"message": "Email already exists"}, 400
 
+    # TENANT users get a tenant record in the room picked on the registration form
+    requested_room_id = data.get("room_id")
+    if role == "TENANT" and not requested_room_id:
+        return {
+            "message": "Room selection is required"
+        }, 400
+
+    try:
+        password_hash = hash_password(password)
+    except PasswordHasherBusy:
+        return {"message": "Too many registrations in progress, please retry shortly"}, 503
+
     try:
-        # Store password as plain text for demo (for login to work)
-        # In production, use proper hashing
         user = User(
-            email=data["email"].lower(),
-            password=data["password"],  # Store plain password for easy login
-            role=data.get("role", "TENANT")
+            email=email,
+            password=password_hash,
+            role=role
         )
         db.session.add(user)
-        db.session.commit()
+        db.session.flush()
 
-        # If user is a TENANT, create a tenant record automatically.
-        # Use provided room_id (from the registration form) if available, otherwise pick the first Available room.
+        # User, room claim and tenant are committed together, so a lost race
+        # for the room leaves nothing behind.
         created_tenant_id = None
         if user.role == "TENANT":
-            # Prefer room_id provided by client (so frontend can let user pick a room)
-            requested_room_id = data.get("room_id")
-            available_room = None
-
-            if requested_room_id:
-                available_room = Room.query.filter_by(
-                    id=int(requested_room_id),
-                    status="Available"
-                ).first()
-
-                if not available_room:
-                    return {
-                        "message": "Selected room is no longer available"
-                    }, 400
-            else:
+            if not claim_room(int(requested_room_id)):
+                db.session.rollback()
                 return {
-                    "message": "Room selection is required"
+                    "message": "Selected room is no longer available"
                 }, 400
 
-            if available_room:
-                tenant = Tenant(
-                    user_id=user.id,
-                    name=data.get("name", data["email"].split("@")[0]),
-                    phone=data.get("phone", ""),
-                    join_date=date.today(),
-                    room_id=available_room.id
-                )
-                db.session.add(tenant)
-                # Mark the room as occupied
-                available_room.status = "Occupied"
-                db.session.add(available_room)
-                db.session.commit()
-                created_tenant_id = tenant.id
+            tenant = Tenant(
+                user_id=user.id,
+                name=data.get("name", email.split("@")[0]),
+                phone=data.get("phone", ""),
+                join_date=date.today(),
+                room_id=int(requested_room_id)
+            )
+            db.session.add(tenant)
+            db.session.flush()
+            created_tenant_id = tenant.id
+
+        db.session.commit()
 
         resp = {"message": "User created", "user_id": user.id}
         if created_tenant_id:
             resp["tenant_id"] = created_tenant_id
         return resp, 201
+    except IntegrityError:
+        # Another registration with the same email committed first
+        db.session.rollback()
+        return {"message": "Email already exists"}, 400
     except Exception as e:
         db.session.rollback()
         return {"message": f"Registration failed: {str(e)}"}, 500
@@ -172,28 +420,23 @@ def login():
     email = data.get("email", "").lower()
     password = data.get("password", "")
 
-    user = User.query.filter_by(email=email).first()
-
-    if not user:
-        return {"error": "Invalid credentials"}, 401
-
-    # Check password - try plain comparison first, then try hash verification
-    password_valid = False
-
-    # Direct plain text comparison
-    if user.password == password:
-        password_valid = True
-    # Fallback: try werkzeug hash verification for hashed passwords
-    elif user.password.startswith('pbkdf2:') or user.password.startswith('scrypt:') or user.password.startswith('bcrypt:'):
-        try:
-            password_valid = check_password_hash(user.password, password)
-        except:
-            password_valid = False
-
-    if not password_valid:
-        return {"error": "Invalid credentials"}, 401
-
-    login_user(user)
+    try:
+        user = User.query.filter_by(email=email).first()
+        if not user:
+            dummy_verify(password)
+            return {"error": "Invalid credentials"}, 401
+
+        if not verify_password(user.password, password):
+            return {"error": "Invalid credentials"}, 401
+
+        # Upgrade plain-text and weaker hashes now that we know the password
+        if needs_rehash(user.password):
+            user.password = hash_password(password)
+            db.session.commit()
+    except PasswordHasherBusy:
+        return {"error": "Too many login attempts, please retry shortly"}, 503
+
+    login_user(session_user(user))
     return {"message": "Login successful", "role": user.role}
 
 @app.route("/current-user", methods=["GET"])
@@ -208,16 +451,19 @@ def get_current_user():
 
 @app.route("/users", methods=["GET"])
 @login_required
+@conditional_get('users')
 def list_users():
     """List all users (admin only)"""
     if current_user.role != "ADMIN":
         return {"error": "Unauthorized"}, 403
 
-    users = User.query.all()
-    return jsonify([
-        {"id": u.id, "email": u.email, "role": u.role}
-        for u in users
-    ])
+    try:
+        limit, after, fields = parse_list_args(USER_FIELDS)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    rows, next_cursor = paginate(select_fields(fields, USER_FIELDS, User), User, limit, after)
+    return list_response(project(rows, fields, USER_FIELDS), next_cursor)
 
 @app.route("/logout")
 @login_required
@@ -240,19 +486,16 @@ def add_room():
     return {"message": "Room added"}
 
 @app.route("/rooms", methods=["GET"])
+@conditional_get('rooms')
 def list_rooms():
     # Allow unauthenticated access so users can see rooms during registration
-    rooms = Room.query.all()
-    return jsonify([
-        {
-            "id": r.id,
-            "room_no": r.room_no,
-            "room_type": r.room_type,
-            "rent": r.rent,
-            "status": r.status
-        }
-        for r in rooms
-    ])
+    try:
+        limit, after, fields = parse_list_args(ROOM_FIELDS)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    rows, next_cursor = paginate(select_fields(fields, ROOM_FIELDS, Room), Room, limit, after)
+    return list_response(project(rows, fields, ROOM_FIELDS), next_cursor)
 
 # ---------------- TENANTS (ADMIN) ----------------
 
@@ -280,89 +523,116 @@ def add_tenant():
         join_date=data.get("join_date") or date.today(),
         room_id=data.get("room_id")
     )
-    db.session.add(tenant)
 
-    # If a room_id was provided, mark that room as occupied
-    if tenant.room_id:
-        room = Room.query.get(tenant.room_id)
-        if room:
-            room.status = "Occupied"
-            db.session.add(room)
+    # If a room_id was provided, claim that room in the same transaction
+    if tenant.room_id and not claim_room(int(tenant.room_id)):
+        db.session.rollback()
+        return {"error": "Selected room is no longer available"}, 400
 
+    db.session.add(tenant)
     db.session.commit()
     return {"message": "Tenant added", "tenant_id": tenant.id}
 
 @app.route("/tenants", methods=["GET"])
 @login_required
+@conditional_get('tenants', 'users', 'rooms')
 def list_tenants():
-    tenants = Tenant.query.all()
-    tenant_list = []
-    # Lease length (days) can be configured via environment variable LEASE_LENGTH_DAYS
-    lease_days = int(os.getenv('LEASE_LENGTH_DAYS', '30'))
-    for t in tenants:
-        user = User.query.get(t.user_id)
-        room = Room.query.get(t.room_id)
-        # Compute an end_date for the tenant using join_date + lease_days
-        try:
-            if t.join_date:
-                end_date = (t.join_date + timedelta(days=lease_days))
-                end_date_str = str(end_date)
-            else:
-                end_date_str = "N/A"
-        except Exception:
-            end_date_str = "N/A"
-
-        # Expose personal info only to admins
-        tenant_obj = {
-            "id": t.id,
-            "user_id": t.user_id,
-            "name": t.name,
-            "email": user.email if user else "N/A",
-            "phone": t.phone,
-            "room_id": t.room_id,
-            "room_no": room.room_no if room else "N/A",
-            "room_type": room.room_type if room else "N/A",
-            "rent": room.rent if room else 0,
-            "join_date": str(t.join_date) if t.join_date else "N/A",
-            "end_date": end_date_str
-        }
-        if current_user.role == 'ADMIN':
-            tenant_obj['address'] = t.address
-            tenant_obj['id_info'] = t.id_info
+    # Personal info is exposed only to admins
+    if current_user.role == 'ADMIN':
+        allowed = TENANT_FIELDS
+    else:
+        allowed = [f for f in TENANT_FIELDS if f not in TENANT_ADMIN_ONLY_FIELDS]
+    try:
+        limit, after, fields = parse_list_args(allowed)
+    except ValueError as e:
+        return {"error": str(e)}, 400
 
-        tenant_list.append(tenant_obj)
-    return jsonify(tenant_list)
+    # Select only the requested columns, and join user/room in the same query
+    # only when one of their fields is asked for
+    stmt = select_fields(fields, TENANT_FIELDS, Tenant).select_from(Tenant)
+    if joins_needed(fields, TENANT_FIELDS, User):
+        stmt = stmt.outerjoin(User, Tenant.user_id == User.id)
+    if joins_needed(fields, TENANT_FIELDS, Room):
+        stmt = stmt.outerjoin(Room, Tenant.room_id == Room.id)
+
+    rows, next_cursor = paginate(stmt, Tenant, limit, after)
+    return list_response(project(rows, fields, TENANT_FIELDS), next_cursor)
 
 @app.route('/payments/<int:payment_id>/qr', methods=['GET'])
 @login_required
 def payment_qr(payment_id):
-    """Return a QR image URL (Google Chart API) encoding a simple payment link for the payment_id."""
-    payment = Payment.query.get(payment_id)
-    if not payment:
-        return {"error": "Payment not found"}, 404
-
-    # Only tenant who owns the payment or admin may request
-    tenant = Tenant.query.get(payment.tenant_id)
-    if current_user.role != 'ADMIN' and (not tenant or tenant.user_id != current_user.id):
-        return {"error": "Unauthorized"}, 403
+    """Return the payment link and the URL of its locally rendered QR image."""
+    payment_url, error = payment_url_for_current_user(payment_id)
+    if error:
+        return error
 
-    # Build a payment URL that could be used by payment gateway / manual handling
     host = request.host_url.rstrip('/')
-    payment_url = f"{host}/pay?payment_id={payment.id}"
-
-    # For QR code, use simple URL encoding that Google Charts API accepts
-    import urllib.parse
-    qr_data = urllib.parse.quote(payment_url)
-    qr_url = f"https://chart.googleapis.com/chart?chs=300x300&cht=qr&chl={qr_data}"
-
     return jsonify({
         "payment_url": payment_url,
-        "qr_url": qr_url
+        "qr_url": f"{host}/payments/{payment_id}/qr.png"
     })
 
+@app.route('/payments/<int:payment_id>/qr.<fmt>', methods=['GET'])
+@login_required
+def payment_qr_image(payment_id, fmt):
+    """QR code for the payment link as PNG or SVG, rendered on the server.
+    Images are cached in memory and sent with an ETag and long cache headers."""
+    if fmt not in QR_MIMETYPES:
+        return {"error": "Unsupported format, use png or svg"}, 404
+    payment_url, error = payment_url_for_current_user(payment_id)
+    if error:
+        return error
+
+    body, etag = render_qr(payment_url, fmt)
+    response = app.response_class(body, mimetype=QR_MIMETYPES[fmt])
+    response.set_etag(etag)
+    # Private because it needs a login
+    response.cache_control.private = True
+    response.cache_control.max_age = QR_MAX_AGE_SECONDS
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+def payment_url_for_current_user(payment_id):
+    """Payment link for payment_id, if the current user may see it.
+    Returns (payment_url, None) or (None, error response)."""
+    row = db.session.query(Payment.id, Tenant.user_id) \
+        .outerjoin(Tenant, Tenant.id == Payment.tenant_id) \
+        .filter(Payment.id == payment_id) \
+        .first()
+    if not row:
+        return None, ({"error": "Payment not found"}, 404)
+
+    # Only tenant who owns the payment or admin may request
+    if current_user.role != 'ADMIN' and row.user_id != current_user.id:
+        return None, ({"error": "Unauthorized"}, 403)
+
+    # Build a payment URL that could be used by payment gateway / manual handling
+    host = request.host_url.rstrip('/')
+    return f"{host}/pay?payment_id={payment_id}", None
+
+
+def unpaid_payments_due_between(start, end):
+    """Unpaid payments with start <= due_date <= end, with the tenant name joined.
+    Rows are (id, amount, due_date, tenant_name) ordered by due_date."""
+    return db.session.query(Payment.id, Payment.amount, Payment.due_date, Tenant.name) \
+        .outerjoin(Tenant, Payment.tenant_id == Tenant.id) \
+        .filter(Payment.paid == False, Payment.due_date >= start, Payment.due_date <= end) \
+        .order_by(Payment.due_date, Payment.id) \
+        .all()
+
+def tenants_ending_between(start, end, lease_days):
+    """Tenants whose lease end date (join_date + lease_days) falls in [start, end].
+    The window is translated to join_date so it is applied in SQL.
+    Rows are (id, name, join_date, user_id) ordered by join_date."""
+    return db.session.query(Tenant.id, Tenant.name, Tenant.join_date, Tenant.user_id) \
+        .filter(Tenant.join_date >= start - timedelta(days=lease_days),
+                Tenant.join_date <= end - timedelta(days=lease_days)) \
+        .order_by(Tenant.join_date, Tenant.id) \
+        .all()
 
 @app.route('/admin/payment-summary', methods=['GET'])
 @login_required
+@conditional_get('payments', 'tenants')
 def admin_payment_summary():
     if current_user.role != 'ADMIN':
         return {"error": "Unauthorized"}, 403
@@ -372,18 +642,17 @@ def admin_payment_summary():
         due_today = 0
         counts_by_date = {}
 
-        payments = Payment.query.filter_by(paid=False).all()
-        for p in payments:
-            if not p.due_date:
-                continue
-            days_left = (p.due_date - today).days
-            if days_left < 0:
-                continue
-            if days_left == 0:
-                due_today += 1
-            if 0 < days_left <= upcoming_days:
-                dstr = str(p.due_date)
-                counts_by_date[dstr] = counts_by_date.get(dstr, 0) + 1
+        rows = db.session.query(Payment.due_date, func.count(Payment.id)) \
+            .filter(Payment.paid == False,
+                    Payment.due_date >= today,
+                    Payment.due_date <= today + timedelta(days=upcoming_days)) \
+            .group_by(Payment.due_date) \
+            .all()
+        for due_date, count in rows:
+            if due_date == today:
+                due_today = count
+            else:
+                counts_by_date[str(due_date)] = count
 
         upcoming_list = [{"date": d, "count": counts_by_date[d]} for d in sorted(counts_by_date.keys())]
         total_upcoming = sum(counts_by_date.values())
@@ -397,23 +666,16 @@ def payment_due_check_once():
     """Check unpaid payments for due_date and notify admins (via email) and return summary."""
     results = []
     try:
-        payments = Payment.query.filter_by(paid=False).all()
         today = date.today()
         upcoming_days = int(os.getenv('REMINDER_UPCOMING_DAYS', '30'))
         due_today = []
         upcoming = {}
 
-        for p in payments:
-            if not p.due_date:
-                continue
-            days_left = (p.due_date - today).days
-            if days_left < 0:
-                continue
-            if days_left == 0:
+        for p in unpaid_payments_due_between(today, today + timedelta(days=upcoming_days)):
+            if p.due_date == today:
                 due_today.append(p)
-            if 0 < days_left <= upcoming_days:
-                dstr = str(p.due_date)
-                upcoming[dstr] = upcoming.get(dstr, []) + [p]
+            else:
+                upcoming.setdefault(str(p.due_date), []).append(p)
 
         # Notify admins if any due_today or upcoming
         admin_emails = [u.email for u in User.query.filter_by(role='ADMIN').all()]
@@ -424,16 +686,13 @@ def payment_due_check_once():
             body_lines.append(f"Payments upcoming (next {upcoming_days} days): {sum(len(v) for v in upcoming.values())}")
             body_lines.append('\nDetails:')
             for p in due_today:
-                tenant = Tenant.query.get(p.tenant_id)
-                body_lines.append(f"Due today - Tenant: {tenant.name if tenant else 'N/A'} - Payment ID: {p.id} - Amount: {p.amount}")
+                body_lines.append(f"Due today - Tenant: {p.name if p.name is not None else 'N/A'} - Payment ID: {p.id} - Amount: {p.amount}")
             for d in sorted(upcoming.keys()):
                 for p in upcoming[d]:
-                    tenant = Tenant.query.get(p.tenant_id)
-                    body_lines.append(f"Upcoming {d} - Tenant: {tenant.name if tenant else 'N/A'} - Payment ID: {p.id} - Amount: {p.amount}")
+                    body_lines.append(f"Upcoming {d} - Tenant: {p.name if p.name is not None else 'N/A'} - Payment ID: {p.id} - Amount: {p.amount}")
 
             body = '\n'.join(body_lines)
-            for admin_email in admin_emails:
-                send_email_smtp(admin_email, subject, body)
+            queue_emails([(admin_email, subject, body) for admin_email in admin_emails])
 
         # Build simple results list for API usage
         results.append({"due_today": len(due_today), "total_upcoming": sum(len(v) for v in upcoming.values())})
@@ -444,43 +703,97 @@ def payment_due_check_once():
 
 
 # ============ RECEIPTS ============
+def receipt_query():
+    """Payment joined with everything a receipt shows, in one query."""
+    return db.session.query(
+        Payment.id, Payment.month, Payment.amount, Payment.paid,
+        Tenant.name, Tenant.phone, Tenant.user_id, User.email, Room.room_no, Room.room_type
+    ).outerjoin(Tenant, Tenant.id == Payment.tenant_id) \
+        .outerjoin(User, User.id == Tenant.user_id) \
+        .outerjoin(Room, Room.id == Tenant.room_id)
+
+def receipt_data(row):
+    return {
+        "receipt_id": row.id,
+        "receipt_date": str(date.today()),
+        "tenant_name": row.name,
+        "tenant_email": row.email,
+        "tenant_phone": row.phone,
+        "room_no": row.room_no,
+        "room_type": row.room_type,
+        "payment_month": row.month,
+        "rent_amount": row.amount,
+        "payment_status": "PAID" if row.paid else "PENDING",
+        "payment_date": str(date.today()) if row.paid else "Not Paid",
+        "organization": "PG Management System",
+        "receipt_number": f"RCP-{row.id:05d}"
+    }
+
+def receipt_for_current_user(payment_id):
+    """Receipt dict for payment_id, or an error response tuple."""
+    row = receipt_query().filter(Payment.id == payment_id).first()
+    if not row:
+        return None, ({"error": "Payment not found"}, 404)
+
+    # Check authorization - tenant can only see their own receipt
+    if current_user.role == "TENANT" and current_user.id != row.user_id:
+        return None, ({"error": "Unauthorized"}, 403)
+    return receipt_data(row), None
+
 @app.route("/receipts/<int:payment_id>", methods=["GET"])
 @login_required
 def get_receipt(payment_id):
     """Download receipt for a payment"""
-    payment = Payment.query.get(payment_id)
+    data, error = receipt_for_current_user(payment_id)
+    if error:
+        return error
+    return jsonify(data)
 
-    if not payment:
-        return {"error": "Payment not found"}, 404
-
-    tenant = Tenant.query.get(payment.tenant_id)
-    user = User.query.get(tenant.user_id)
-    room = Room.query.get(tenant.room_id)
+@app.route("/receipts/<int:payment_id>.pdf", methods=["GET"])
+@login_required
+def get_receipt_pdf(payment_id):
+    """Receipt as a PDF; paid receipts are rendered once and served from the disk cache."""
+    data, error = receipt_for_current_user(payment_id)
+    if error:
+        return error
+    return app.response_class(
+        receipt_pdf(data),
+        mimetype='application/pdf',
+        headers={"Content-Disposition": f'inline; filename="{receipt_filename(data)}"'}
+    )
 
-    # Check authorization - tenant can only see their own receipt
-    if current_user.role == "TENANT" and current_user.id != tenant.user_id:
+@app.route("/receipts/batch", methods=["GET"])
+@login_required
+def get_receipts_batch():
+    """Admin-only: ZIP of the PDF receipts of every payment for ?month= (optionally ?paid=true/false).
+    The archive is streamed while missing receipts are rendered on a process pool."""
+    if current_user.role != 'ADMIN':
         return {"error": "Unauthorized"}, 403
 
-    receipt_data = {
-        "receipt_id": payment.id,
-        "receipt_date": str(date.today()),
-        "tenant_name": tenant.name,
-        "tenant_email": user.email,
-        "tenant_phone": tenant.phone,
-        "room_no": room.room_no,
-        "room_type": room.room_type,
-        "payment_month": payment.month,
-        "rent_amount": payment.amount,
-        "payment_status": "PAID" if payment.paid else "PENDING",
-        "payment_date": str(date.today()) if payment.paid else "Not Paid",
-        "organization": "PG Management System",
-        "receipt_number": f"RCP-{payment.id:05d}"
-    }
-
-    return jsonify(receipt_data)
+    month = request.args.get('month')
+    if not month:
+        return {"error": "month is required"}, 400
+    try:
+        paid = parse_bool_arg('paid')
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    query = receipt_query().filter(Payment.month == month)
+    if paid is not None:
+        query = query.filter(Payment.paid == paid)
+    receipts = [receipt_data(row) for row in query.order_by(Payment.id)]
+    if not receipts:
+        return {"error": "No payments found for this month"}, 404
+
+    return app.response_class(
+        iter_receipts_zip(receipts),
+        mimetype='application/zip',
+        headers={"Content-Disposition": f'attachment; filename="receipts-{secure_filename(month)}.zip"'}
+    )
 
 @app.route("/tenants/<int:tenant_id>/payments", methods=["GET"])
 @login_required
+@conditional_get('payments', 'tenants')
 def get_tenant_payments(tenant_id):
     """Get all payments for a specific tenant"""
     tenant = Tenant.query.get(tenant_id)
@@ -492,19 +805,64 @@ def get_tenant_payments(tenant_id):
     if current_user.role == "TENANT" and current_user.id != tenant.user_id:
         return {"error": "Unauthorized"}, 403
 
-    payments = Payment.query.filter_by(tenant_id=tenant_id).all()
-    payment_list = []
+    try:
+        limit, after, fields = parse_list_args(TENANT_PAYMENT_FIELDS)
+    except ValueError as e:
+        return {"error": str(e)}, 400
 
-    for p in payments:
-        payment_list.append({
-            "id": p.id,
-            "month": p.month,
-            "amount": p.amount,
-            "paid": p.paid,
-            "status": "PAID" if p.paid else "PENDING"
-        })
+    stmt = select_fields(fields, TENANT_PAYMENT_FIELDS, Payment).where(Payment.tenant_id == tenant_id)
+    rows, next_cursor = paginate(stmt, Payment, limit, after)
+    return list_response(project(rows, fields, TENANT_PAYMENT_FIELDS), next_cursor)
 
-    return jsonify(payment_list)
+@app.route('/payments', methods=['GET'])
+@login_required
+@conditional_get('payments', 'tenants', 'users', 'rooms')
+def list_payments():
+    """List payments with tenant and room details joined in SQL.
+
+    Query params (all optional): paid=true|false, month, tenant_id,
+    due_from/due_to (YYYY-MM-DD, inclusive), plus limit/after/fields.
+    Always paginated: limit defaults to DEFAULT_PAGE_SIZE, and the
+    cursor for the next page is in X-Next-Cursor. Tenants only see their own payments.
+    """
+    try:
+        limit, after, fields = parse_list_args(PAYMENT_FIELDS)
+        if limit is None:
+            limit = DEFAULT_PAGE_SIZE
+        paid = parse_bool_arg('paid')
+        due_from = parse_date_arg('due_from')
+        due_to = parse_date_arg('due_to')
+        tenant_id = parse_int_arg('tenant_id')
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    stmt = select_fields(fields, PAYMENT_FIELDS, Payment).select_from(Payment)
+    if current_user.role != 'ADMIN':
+        own_tenants = select(Tenant.id).where(Tenant.user_id == current_user.id)
+        stmt = stmt.where(Payment.tenant_id.in_(own_tenants))
+    if paid is not None:
+        stmt = stmt.where(Payment.paid == paid)
+    if request.args.get('month'):
+        stmt = stmt.where(Payment.month == request.args['month'])
+    if tenant_id is not None:
+        stmt = stmt.where(Payment.tenant_id == tenant_id)
+    if due_from:
+        stmt = stmt.where(Payment.due_date >= due_from)
+    if due_to:
+        stmt = stmt.where(Payment.due_date <= due_to)
+
+    # Join tenant, user and room in the same query, only for the requested fields
+    need_user = joins_needed(fields, PAYMENT_FIELDS, User)
+    need_room = joins_needed(fields, PAYMENT_FIELDS, Room)
+    if need_user or need_room or joins_needed(fields, PAYMENT_FIELDS, Tenant):
+        stmt = stmt.outerjoin(Tenant, Payment.tenant_id == Tenant.id)
+    if need_user:
+        stmt = stmt.outerjoin(User, Tenant.user_id == User.id)
+    if need_room:
+        stmt = stmt.outerjoin(Room, Tenant.room_id == Room.id)
+
+    rows, next_cursor = paginate(stmt, Payment, limit, after)
+    return list_response(project(rows, fields, PAYMENT_FIELDS), next_cursor)
 
 @app.route('/payments', methods=['POST'])
 @login_required
@@ -531,7 +889,6 @@ def add_payment():
         )
         if due_date:
             try:
-                from datetime import datetime
                 payment.due_date = datetime.strptime(due_date, "%Y-%m-%d").date()
             except Exception:
                 # ignore invalid date format, leave as None
@@ -540,119 +897,618 @@ def add_payment():
         db.session.add(payment)
         db.session.commit()
         return {"message": "Payment created", "payment_id": payment.id}, 201
+    except IntegrityError:
+        db.session.rollback()
+        return {"error": "A payment for this tenant and month already exists"}, 409
     except Exception as e:
         db.session.rollback()
         return {"error": str(e)}, 500
 
-def send_email_smtp(to_email, subject, body):
-    """Send email using SMTP if configuration present. Prints log if not configured."""
-    smtp_user = os.getenv('SMTP_EMAIL')
-    smtp_pass = os.getenv('SMTP_PASSWORD')
-    smtp_host = os.getenv('SMTP_HOST', 'smtp.gmail.com')
-    smtp_port = int(os.getenv('SMTP_PORT', 587))
+@app.route('/payments/generate', methods=['POST'])
+@login_required
+def generate_monthly_payments():
+    """Admin-only: create the rent row for a month for every active tenant.
 
-    if not smtp_user or not smtp_pass:
-        print("SMTP not configured (SMTP_EMAIL/SMTP_PASSWORD missing). Skipping email to:", to_email)
-        return False
+    Request JSON: {"month": "Jan 2026", "due_date": "YYYY-MM-DD" (optional)}
+    Active tenants have a room and a lease that has not ended. Amounts come from
+    Room.rent. Runs as one INSERT ... SELECT; tenants that already have a row for
+    the month are skipped, so re-running for the same month is a no-op.
+    """
+    if current_user.role != 'ADMIN':
+        return {"error": "Unauthorized"}, 403
+
+    data = request.json or {}
+    month = data.get('month')
+    if not month:
+        return {"error": "month is required"}, 400
+    month = str(month)
+    due_date = None
+    if data.get('due_date'):
+        try:
+            due_date = datetime.strptime(data['due_date'], "%Y-%m-%d").date()
+        except ValueError:
+            return {"error": "due_date must be a date in YYYY-MM-DD format"}, 400
+
+    lease_days = int(os.getenv('LEASE_LENGTH_DAYS', '30'))
+    lease_cutoff = date.today() - timedelta(days=lease_days)
+    already_billed = select(Payment.id).where(Payment.tenant_id == Tenant.id, Payment.month == month)
+    active_tenants = select(Tenant.id, Room.rent) \
+        .join(Room, Room.id == Tenant.room_id) \
+        .where(Room.rent.isnot(None),
+               db.or_(Tenant.join_date.is_(None), Tenant.join_date >= lease_cutoff))
 
     try:
-        msg = EmailMessage()
-        msg['Subject'] = subject
-        msg['From'] = smtp_user
-        msg['To'] = to_email
-        msg.set_content(body)
-
-        with smtplib.SMTP(smtp_host, smtp_port) as server:
-            server.starttls()
-            server.login(smtp_user, smtp_pass)
-            server.send_message(msg)
-        print(f"Reminder email sent to {to_email}")
-        return True
+        eligible = db.session.execute(
+            select(func.count()).select_from(active_tenants.subquery())
+        ).scalar()
+        rows = active_tenants.where(~already_billed.exists()) \
+            .add_columns(literal(month), literal(False), literal(due_date, Payment.due_date.type))
+        result = db.session.execute(
+            insert(Payment).from_select(
+                ["tenant_id", "amount", "month", "paid", "due_date"], rows
+            )
+        )
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent run for the same month inserted first; the unique index kept rows unique
+        db.session.rollback()
+        return {"error": "Payments for this month are being generated concurrently, please retry"}, 409
     except Exception as e:
-        print(f"Failed to send email to {to_email}: {e}")
-        return False
+        db.session.rollback()
+        return {"error": str(e)}, 500
+
+    created = result.rowcount
+    return {"month": month, "created": created, "skipped": eligible - created}, 201
+
+# ============ COMPLAINTS ============
+
+# Allowed status transitions; "open" complaints are Pending or In Progress
+COMPLAINT_TRANSITIONS = {
+    "Pending": ("In Progress", "Resolved"),
+    "In Progress": ("Pending", "Resolved"),
+    "Resolved": ("Pending", "Closed"),
+    "Closed": (),
+}
+OPEN_COMPLAINT_STATUSES = ("Pending", "In Progress")
+
+@app.route('/complaints', methods=['POST'])
+@login_required
+def add_complaint():
+    """Create a complaint. Tenants file against their own tenant record;
+    admins must pass tenant_id."""
+    data = request.json or {}
+    category = data.get('category')
+    description = data.get('description')
+    if not category or not description:
+        return {"message": "category and description are required"}, 400
+
+    if current_user.role == 'ADMIN':
+        tenant = Tenant.query.get(data['tenant_id']) if data.get('tenant_id') else None
+    else:
+        tenant = Tenant.query.filter_by(user_id=current_user.id).first()
+    if not tenant:
+        return {"message": "Tenant not found"}, 404
+
+    try:
+        complaint = Complaint(
+            tenant_id=tenant.id,
+            category=str(category),
+            description=str(description),
+            status="Pending"
+        )
+        db.session.add(complaint)
+        db.session.commit()
+        return {"message": "Complaint created", "complaint_id": complaint.id}, 201
+    except Exception as e:
+        db.session.rollback()
+        return {"message": str(e)}, 500
+
+@app.route('/complaints', methods=['GET'])
+@login_required
+@conditional_get('complaints', 'tenants')
+def list_complaints():
+    """List complaints, oldest first.
+
+    Query params (all optional): status (or status=open for Pending + In Progress),
+    category, tenant_id, order=oldest|newest, plus limit/after/fields.
+    Always paginated: limit defaults to DEFAULT_PAGE_SIZE, and the cursor for
+    the next page is in X-Next-Cursor. Tenants only see their own complaints.
+    """
+    try:
+        limit, after, fields = parse_list_args(COMPLAINT_FIELDS)
+        if limit is None:
+            limit = DEFAULT_PAGE_SIZE
+        tenant_id = parse_int_arg('tenant_id')
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    order = request.args.get('order', 'oldest')
+    if order not in ('oldest', 'newest'):
+        return {"error": "order must be oldest or newest"}, 400
+
+    stmt = select_fields(fields, COMPLAINT_FIELDS, Complaint).select_from(Complaint)
+    if current_user.role != 'ADMIN':
+        own_tenants = select(Tenant.id).where(Tenant.user_id == current_user.id)
+        stmt = stmt.where(Complaint.tenant_id.in_(own_tenants))
+    status = request.args.get('status')
+    if status == 'open':
+        stmt = stmt.where(Complaint.status.in_(OPEN_COMPLAINT_STATUSES))
+    elif status:
+        stmt = stmt.where(Complaint.status == status)
+    if request.args.get('category'):
+        stmt = stmt.where(Complaint.category == request.args['category'])
+    if tenant_id is not None:
+        stmt = stmt.where(Complaint.tenant_id == tenant_id)
+    if joins_needed(fields, COMPLAINT_FIELDS, Tenant):
+        stmt = stmt.outerjoin(Tenant, Complaint.tenant_id == Tenant.id)
+
+    rows, next_cursor = paginate(stmt, Complaint, limit, after, descending=(order == 'newest'))
+    return list_response(project(rows, fields, COMPLAINT_FIELDS), next_cursor)
+
+@app.route('/complaints/counts', methods=['GET'])
+@login_required
+@conditional_get('complaints', 'tenants')
+def complaint_counts():
+    """Admin-only: complaint counts by status, and open complaints by category.
+    Response JSON: {"by_status": {"Pending": n, ...}, "open_by_category": {"Plumbing": n, ...}, "open_total": n}
+    """
+    if current_user.role != 'ADMIN':
+        return {"error": "Unauthorized"}, 403
+
+    by_status = dict(
+        db.session.query(Complaint.status, db.func.count(Complaint.id))
+        .group_by(Complaint.status).all()
+    )
+    open_by_category = dict(
+        db.session.query(Complaint.category, db.func.count(Complaint.id))
+        .filter(Complaint.status.in_(OPEN_COMPLAINT_STATUSES))
+        .group_by(Complaint.category).all()
+    )
+    return jsonify({
+        "by_status": by_status,
+        "open_by_category": open_by_category,
+        "open_total": sum(open_by_category.values())
+    })
+
+@app.route('/complaints/<int:complaint_id>/status', methods=['POST'])
+@login_required
+def update_complaint_status(complaint_id):
+    """Admin-only: move a complaint to a new status.
+    Request JSON: {"status": "In Progress"}. See COMPLAINT_TRANSITIONS for allowed moves.
+    """
+    if current_user.role != 'ADMIN':
+        return {"error": "Unauthorized"}, 403
+
+    new_status = (request.json or {}).get('status')
+    if new_status not in COMPLAINT_TRANSITIONS:
+        return {"error": f"status must be one of: {', '.join(COMPLAINT_TRANSITIONS)}"}, 400
+
+    complaint = Complaint.query.get(complaint_id)
+    if not complaint:
+        return {"error": "Complaint not found"}, 404
+    current_status = complaint.status or "Pending"
+    if new_status not in COMPLAINT_TRANSITIONS.get(current_status, ()):
+        return {"error": f"Cannot move complaint from {current_status} to {new_status}"}, 409
+
+    # Only apply the change if nobody else moved the complaint in the meantime
+    updated = Complaint.query.filter_by(id=complaint_id, status=complaint.status).update(
+        {"status": new_status}, synchronize_session=False
+    )
+    db.session.commit()
+    if not updated:
+        return {"error": "Complaint status changed concurrently, please retry"}, 409
+    return {"message": "Complaint updated", "complaint_id": complaint_id, "status": new_status}
+
+# ============ DASHBOARD ============
+
+@app.route('/dashboard/stats', methods=['GET'])
+@login_required
+@conditional_get('rooms', 'tenants', 'payments', 'complaints')
+def dashboard_stats():
+    """Dashboard counters computed in one aggregate statement.
+    Response JSON:
+    {
+      "rooms": {"total": n, "by_status": {"Available": n, ...}},
+      "tenants": n,
+      "pending_payments": {"count": n, "amount": n},
+      "open_complaints": {"total": n, "by_category": {"Plumbing": n, ...}},
+      "my_end_date": "YYYY-MM-DD"   # tenants only
+    }
+    Payment and complaint figures are limited to the caller's own records for tenants.
+    """
+    pending = select(literal('payments'), null(), func.count(Payment.id), func.sum(Payment.amount)) \
+        .where(Payment.paid == False)
+    complaints = select(literal('complaints'), Complaint.category, func.count(Complaint.id), null()) \
+        .where(Complaint.status.in_(OPEN_COMPLAINT_STATUSES))
+    my_tenant = None
+    if current_user.role != 'ADMIN':
+        my_tenant = Tenant.query.filter_by(user_id=current_user.id).first()
+        own_tenants = select(Tenant.id).where(Tenant.user_id == current_user.id)
+        pending = pending.where(Payment.tenant_id.in_(own_tenants))
+        complaints = complaints.where(Complaint.tenant_id.in_(own_tenants))
+
+    # Rows are (kind, key, count, amount); one GROUP BY/COUNT per section
+    stmt = union_all(
+        select(literal('rooms'), Room.status, func.count(Room.id), null()).group_by(Room.status),
+        select(literal('tenants'), null(), func.count(Tenant.id), null()),
+        pending,
+        complaints.group_by(Complaint.category),
+    )
+
+    stats = {
+        "rooms": {"total": 0, "by_status": {}},
+        "tenants": 0,
+        "pending_payments": {"count": 0, "amount": 0},
+        "open_complaints": {"total": 0, "by_category": {}},
+    }
+    for kind, key, count, amount in db.session.execute(stmt):
+        if kind == 'rooms':
+            stats["rooms"]["by_status"][key or "Unknown"] = count
+            stats["rooms"]["total"] += count
+        elif kind == 'tenants':
+            stats["tenants"] = count
+        elif kind == 'payments':
+            stats["pending_payments"] = {"count": count, "amount": amount or 0}
+        elif kind == 'complaints':
+            stats["open_complaints"]["by_category"][key or "Other"] = count
+            stats["open_complaints"]["total"] += count
+
+    if current_user.role != 'ADMIN':
+        stats["my_end_date"] = tenant_end_date(my_tenant) if my_tenant else "N/A"
+    return jsonify(stats)
+
+# ============ BULK IMPORT ============
+
+def import_records():
+    """Records from the upload: a multipart "file" field or the raw request body.
+    The format comes from ?format=csv|ndjson, the file name or the Content-Type."""
+    upload = request.files.get('file')
+    if upload:
+        fmt = detect_format(upload.mimetype, upload.filename, request.args.get('format'))
+        return iter_records(upload.stream, fmt)
+    fmt = detect_format(request.mimetype, None, request.args.get('format'))
+    return iter_records(request.stream, fmt)
+
+def validate_room_row(record):
+    status = clean_text(record, 'status') or 'Available'
+    if status not in ('Available', 'Occupied'):
+        raise RowError("status must be Available or Occupied")
+    rent = clean_int(record, 'rent')
+    if rent is not None and rent < 0:
+        raise RowError("rent must not be negative")
+    return {
+        "room_no": clean_text(record, 'room_no', required=True, max_length=20),
+        "room_type": clean_text(record, 'room_type', max_length=50),
+        "rent": rent,
+        "status": status,
+    }
+
+def check_room_rows(rows):
+    """Reject room numbers that already exist or repeat within the chunk."""
+    existing = {
+        room_no for (room_no,) in
+        db.session.query(Room.room_no).filter(Room.room_no.in_({r["room_no"] for r in rows}))
+    }
+    conflicts, seen = {}, set()
+    for i, row in enumerate(rows):
+        if row["room_no"] in existing or row["room_no"] in seen:
+            conflicts[i] = f"Room {row['room_no']} already exists"
+        seen.add(row["room_no"])
+    return conflicts
+
+def insert_room_rows(rows):
+    db.session.execute(insert(Room), rows)
+
+def validate_tenant_row(record):
+    return {
+        "name": clean_text(record, 'name', required=True, max_length=100),
+        "phone": clean_text(record, 'phone', max_length=15),
+        "user_id": clean_int(record, 'user_id'),
+        "email": (clean_text(record, 'email') or '').lower() or None,
+        "room_id": clean_int(record, 'room_id'),
+        "room_no": clean_text(record, 'room_no'),
+        "join_date": clean_date(record, 'join_date') or date.today(),
+        "address": clean_text(record, 'address', max_length=300),
+        "id_info": clean_text(record, 'id_info', max_length=300),
+    }
+
+def check_tenant_rows(rows):
+    """Resolve email -> user_id and room_no -> room_id with one query each, and
+    reject unknown users/rooms and rooms that are not Available (or are taken
+    by an earlier row of the chunk)."""
+    emails = {r["email"] for r in rows if r["email"]}
+    user_ids = {r["user_id"] for r in rows if r["user_id"]}
+    users_by_email = dict(db.session.query(User.email, User.id).filter(User.email.in_(emails))) if emails else {}
+    known_user_ids = {uid for (uid,) in db.session.query(User.id).filter(User.id.in_(user_ids))} if user_ids else set()
+
+    room_nos = {r["room_no"] for r in rows if r["room_no"]}
+    room_ids = {r["room_id"] for r in rows if r["room_id"]}
+    rooms = db.session.query(Room.id, Room.room_no, Room.status) \
+        .filter(db.or_(Room.room_no.in_(room_nos), Room.id.in_(room_ids))).all() if (room_nos or room_ids) else []
+    rooms_by_no = {r.room_no: r for r in rooms}
+    rooms_by_id = {r.id: r for r in rooms}
+
+    conflicts, claimed = {}, set()
+    for i, row in enumerate(rows):
+        if row["email"]:
+            if row["email"] not in users_by_email:
+                conflicts[i] = f"No user with email {row['email']}"
+                continue
+            row["user_id"] = users_by_email[row["email"]]
+        elif row["user_id"] and row["user_id"] not in known_user_ids:
+            conflicts[i] = f"User {row['user_id']} not found"
+            continue
+
+        room = rooms_by_no.get(row["room_no"]) if row["room_no"] else rooms_by_id.get(row["room_id"])
+        if row["room_no"] or row["room_id"]:
+            if not room:
+                conflicts[i] = f"Room {row['room_no'] or row['room_id']} not found"
+                continue
+            if room.status != "Available" or room.id in claimed:
+                conflicts[i] = f"Room {room.room_no} is not available"
+                continue
+            row["room_id"] = room.id
+            claimed.add(room.id)
+    return conflicts
+
+def insert_tenant_rows(rows):
+    """Claim the rooms with one conditional UPDATE, then insert the tenants."""
+    room_ids = [r["room_id"] for r in rows if r["room_id"]]
+    if room_ids:
+        claimed = Room.query.filter(Room.id.in_(room_ids), Room.status == "Available") \
+            .update({"status": "Occupied"}, synchronize_session=False)
+        if claimed != len(room_ids):
+            raise RowError("Room is no longer available")
+    columns = ("user_id", "name", "phone", "join_date", "room_id", "address", "id_info")
+    db.session.execute(insert(Tenant), [{c: r[c] for c in columns} for r in rows])
+
+def validate_payment_row(record):
+    amount = clean_int(record, 'amount', required=True)
+    if amount < 0:
+        raise RowError("amount must not be negative")
+    return {
+        "tenant_id": clean_int(record, 'tenant_id', required=True),
+        "month": clean_text(record, 'month', required=True, max_length=20),
+        "amount": amount,
+        "paid": clean_bool(record, 'paid'),
+        "due_date": clean_date(record, 'due_date'),
+    }
+
+def check_payment_rows(rows):
+    """Reject unknown tenants and tenant/month pairs that already have a payment."""
+    tenant_ids = {r["tenant_id"] for r in rows}
+    known = {tid for (tid,) in db.session.query(Tenant.id).filter(Tenant.id.in_(tenant_ids))}
+    existing = set(
+        db.session.query(Payment.tenant_id, Payment.month)
+        .filter(Payment.tenant_id.in_(tenant_ids), Payment.month.in_({r["month"] for r in rows}))
+    )
+    conflicts, seen = {}, set()
+    for i, row in enumerate(rows):
+        key = (row["tenant_id"], row["month"])
+        if row["tenant_id"] not in known:
+            conflicts[i] = f"Tenant {row['tenant_id']} not found"
+        elif key in existing or key in seen:
+            conflicts[i] = f"Tenant {row['tenant_id']} already has a payment for {row['month']}"
+        seen.add(key)
+    return conflicts
+
+def insert_payment_rows(rows):
+    db.session.execute(insert(Payment), rows)
+
+IMPORTERS = {
+    "rooms": (validate_room_row, check_room_rows, insert_room_rows),
+    "tenants": (validate_tenant_row, check_tenant_rows, insert_tenant_rows),
+    "payments": (validate_payment_row, check_payment_rows, insert_payment_rows),
+}
+
+@app.route('/import/<kind>', methods=['POST'])
+@login_required
+def bulk_import(kind):
+    """Admin-only: stream a CSV or NDJSON file of rooms, tenants or payments.
+
+    Columns:
+      rooms:    room_no, room_type, rent, status
+      tenants:  name, phone, user_id or email, room_id or room_no, join_date, address, id_info
+      payments: tenant_id, month, amount, paid, due_date
+    Rows are validated as they are read and inserted in chunked transactions.
+    Response JSON: {"inserted": n, "failed": n, "errors": [{"line": n, "error": "..."}], "errors_truncated": bool,
+                    "file_error": null or {"line": n, "error": "..."}}
+    A file that cannot be read to the end (not UTF-8, broken CSV) answers 400 with
+    the report so far; rows before the bad spot are already inserted.
+    """
+    if current_user.role != 'ADMIN':
+        return {"error": "Unauthorized"}, 403
+    if kind not in IMPORTERS:
+        return {"error": f"Unknown import type: {kind}"}, 404
+
+    try:
+        records = import_records()
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    validate_row, check_chunk, insert_chunk = IMPORTERS[kind]
+    report = run_import(db.session, records, validate_row, check_chunk, insert_chunk)
+    return jsonify(report), 400 if report["file_error"] else 200
+
+# ============ EXPORTS ============
+
+def export_payments_query(date_from, date_to, status):
+    """Payments with tenant and room joined; date range applies to due_date,
+    status is paid or pending."""
+    stmt = select(
+        Payment.id, Payment.tenant_id, Tenant.name.label("tenant_name"), Room.room_no,
+        Payment.month, Payment.amount, Payment.paid, Payment.due_date
+    ).outerjoin(Tenant, Tenant.id == Payment.tenant_id) \
+     .outerjoin(Room, Room.id == Tenant.room_id)
+    if status not in (None, 'paid', 'pending'):
+        raise ValueError("status must be paid or pending")
+    if status:
+        stmt = stmt.where(Payment.paid == (status == 'paid'))
+    if date_from:
+        stmt = stmt.where(Payment.due_date >= date_from)
+    if date_to:
+        stmt = stmt.where(Payment.due_date <= date_to)
+    return stmt.order_by(Payment.id)
+
+def export_tenants_query(date_from, date_to, status):
+    """Tenants with email and room joined; date range applies to join_date,
+    status is active or ended (lease end date passed)."""
+    stmt = select(
+        Tenant.id, Tenant.user_id, Tenant.name, User.email, Tenant.phone,
+        Tenant.room_id, Room.room_no, Tenant.join_date, Tenant.address, Tenant.id_info
+    ).outerjoin(User, User.id == Tenant.user_id) \
+     .outerjoin(Room, Room.id == Tenant.room_id)
+    if status not in (None, 'active', 'ended'):
+        raise ValueError("status must be active or ended")
+    if status:
+        lease_days = int(os.getenv('LEASE_LENGTH_DAYS', '30'))
+        cutoff = date.today() - timedelta(days=lease_days)
+        stmt = stmt.where(Tenant.join_date >= cutoff if status == 'active' else Tenant.join_date < cutoff)
+    if date_from:
+        stmt = stmt.where(Tenant.join_date >= date_from)
+    if date_to:
+        stmt = stmt.where(Tenant.join_date <= date_to)
+    return stmt.order_by(Tenant.id)
+
+def export_complaints_query(date_from, date_to, status):
+    """Complaints with tenant name joined; status is a complaint status or "open".
+    Complaints carry no date column, so a date range is rejected."""
+    if date_from or date_to:
+        raise ValueError("complaints have no date to filter on; use status or category")
+    stmt = select(
+        Complaint.id, Complaint.tenant_id, Tenant.name.label("tenant_name"),
+        Complaint.category, Complaint.description, Complaint.status
+    ).outerjoin(Tenant, Tenant.id == Complaint.tenant_id)
+    if status == 'open':
+        stmt = stmt.where(Complaint.status.in_(OPEN_COMPLAINT_STATUSES))
+    elif status:
+        stmt = stmt.where(Complaint.status == status)
+    if request.args.get('category'):
+        stmt = stmt.where(Complaint.category == request.args['category'])
+    return stmt.order_by(Complaint.id)
+
+EXPORTERS = {
+    "payments": export_payments_query,
+    "tenants": export_tenants_query,
+    "complaints": export_complaints_query,
+}
+
+@app.route('/export/<kind>', methods=['GET'])
+@login_required
+def bulk_export(kind):
+    """Admin-only: stream payments, tenants or complaints as CSV or NDJSON.
+
+    Query params: format=csv|ndjson (default csv), from/to (YYYY-MM-DD, inclusive), status.
+    Rows are streamed from the database as they are written, so large exports
+    start immediately and use constant memory.
+    """
+    if current_user.role != 'ADMIN':
+        return {"error": "Unauthorized"}, 403
+    if kind not in EXPORTERS:
+        return {"error": f"Unknown export type: {kind}"}, 404
+
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return {"error": "format must be csv or ndjson"}, 400
+    try:
+        stmt = EXPORTERS[kind](parse_date_arg('from'), parse_date_arg('to'),
+                               request.args.get('status') or None)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    return export_response(db.session, stmt, fmt, f"{kind}-{date.today()}")
 
 def due_date_check_once():
-    """Run a single pass of the reminder check and attempt to send emails.
+    """Run a single pass of the reminder check and queue reminder emails.
+    Only tenants at the reminder threshold or past their end date are loaded;
+    expired rooms are freed with a single UPDATE.
     Returns a list of dicts describing actions taken for easy inspection/testing.
     """
     results = []
     try:
-        tenants = Tenant.query.all()
         lease_days = int(os.getenv('LEASE_LENGTH_DAYS', '30'))
         reminder_days = int(os.getenv('REMINDER_DAYS_BEFORE', '7'))
+        today = date.today()
 
-        for t in tenants:
-            if not t.join_date:
-                continue
+        # end_date = join_date + lease_days, so both conditions are applied to join_date
+        reminders = db.session.query(Tenant.id, Tenant.name, Tenant.join_date, User.email) \
+            .outerjoin(User, User.id == Tenant.user_id) \
+            .filter(Tenant.join_date == today + timedelta(days=reminder_days - lease_days)) \
+            .all()
+        emails = []
+        for t in reminders:
             end_date = t.join_date + timedelta(days=lease_days)
-            days_left = (end_date - date.today()).days
-            # If tenant is at reminder threshold, notify tenant
-            if days_left == reminder_days:
-                user = User.query.get(t.user_id)
-                if user and user.email:
-                    subject = "Your tenancy end date is approaching"
-                    body = f"Hello {t.name},\n\nYour tenancy is scheduled to end on {end_date}. Please let us know whether you want to continue staying or leave. Reply to this email or contact the admin.\n\nRegards,\nPG Management"
-                    sent = send_email_smtp(user.email, subject, body)
-                    results.append({"tenant_id": t.id, "email": user.email, "sent": sent, "days_left": days_left})
-                else:
-                    results.append({"tenant_id": t.id, "email": None, "sent": False, "days_left": days_left})
-            # If tenant's end_date has passed, free the room automatically
-            if days_left < 0:
-                try:
-                    room = Room.query.get(t.room_id) if t.room_id else None
-                    if room and room.status != 'Available':
-                        room.status = 'Available'
-                        db.session.add(room)
-                        db.session.commit()
-                        results.append({"tenant_id": t.id, "freed_room_id": room.id, "room_no": room.room_no})
-                except Exception as e:
-                    print('Error freeing room for tenant', t.id, e)
-                    db.session.rollback()
+            if t.email:
+                subject = "Your tenancy end date is approaching"
+                body = f"Hello {t.name},\n\nYour tenancy is scheduled to end on {end_date}. Please let us know whether you want to continue staying or leave. Reply to this email or contact the admin.\n\nRegards,\nPG Management"
+                emails.append((t.email, subject, body))
+                results.append({"tenant_id": t.id, "email": t.email, "queued": True, "days_left": reminder_days})
+            else:
+                results.append({"tenant_id": t.id, "email": None, "queued": False, "days_left": reminder_days})
+        if emails:
+            queue_emails(emails)
+
+        # If tenant's end_date has passed, free the room automatically
+        expired = db.session.query(Tenant.id, Room.id, Room.room_no) \
+            .join(Room, Room.id == Tenant.room_id) \
+            .filter(Tenant.join_date < today - timedelta(days=lease_days),
+                    Room.status != 'Available') \
+            .order_by(Tenant.id) \
+            .all()
+        freed = {}
+        for tenant_id, room_id, room_no in expired:
+            # A room shared by several expired tenants is reported once, for the first of them
+            freed.setdefault(room_id, {"tenant_id": tenant_id, "freed_room_id": room_id, "room_no": room_no})
+        if freed:
+            try:
+                Room.query.filter(Room.id.in_(list(freed)), Room.status != 'Available') \
+                    .update({"status": "Available"}, synchronize_session=False)
+                db.session.commit()
+                results.extend(freed.values())
+            except Exception as e:
+                print('Error freeing rooms for expired tenants:', e)
+                db.session.rollback()
+
+        # Same order as a tenant-by-tenant pass
+        results.sort(key=lambda r: r["tenant_id"])
     except Exception as e:
         print("Error during due_date_check_once:", e)
+        db.session.rollback()
         results.append({"error": str(e)})
 
     return results
 
-def due_date_reminder_worker():
-    """Background worker that checks tenants and sends reminder emails before end_date.
-    Runs in a loop once per day (or faster if DEV_REMINDER_INTERVAL_SECONDS set).
-    """
-    # Number of days before end_date to send reminder
-    reminder_days = int(os.getenv('REMINDER_DAYS_BEFORE', '7'))
-    # Sleep interval between checks (seconds). Default one day.
-    interval = int(os.getenv('REMINDER_INTERVAL_SECONDS', str(24*60*60)))
+def raise_on_check_errors(results):
+    """The check functions report failures as {"error": ...} entries; turn them
+    into an exception so the scheduler records the run as failed. The results
+    ride along on the exception so callers of run_job() still get them."""
+    errors = [r["error"] for r in results if "error" in r]
+    if errors:
+        raise JobFailed("; ".join(errors), results)
+
+def lease_reminder_job():
+    """Scheduled job: tenant end-date reminders and freeing rooms of expired tenants."""
+    results = due_date_check_once()
+    if results:
+        print("Due-date reminder run results:", results)
+    raise_on_check_errors(results)
+    return results
 
-    print("Due date reminder worker started: checking every", interval, "seconds")
-    while True:
-        try:
-            with app.app_context():
-                # Reuse the single-run checker so behavior is consistent and testable
-                results = due_date_check_once()
-                if results:
-                    print("Due-date reminder worker run results:", results)
-                # Run payment due checks as well
-                payment_results = payment_due_check_once()
-                if payment_results:
-                    print("Payment reminder run results:", payment_results)
-                # Additionally, free rooms whose tenant end_date is passed
-                # Implemented inside due_date_check_once: mark rooms Available when end_date < today
-        except Exception as e:
-            print("Error in reminder worker:", e)
-
-        # Sleep before next run
-        time.sleep(interval)
+def payment_reminder_job():
+    """Scheduled job: notify admins about payments due today and upcoming."""
+    results = payment_due_check_once()
+    if results:
+        print("Payment reminder run results:", results)
+    raise_on_check_errors(results)
+    return results
+
+# Sleep interval between runs (seconds). Default one day.
+REMINDER_INTERVAL_SECONDS = int(os.getenv('REMINDER_INTERVAL_SECONDS', str(24*60*60)))
+register_job('lease_reminders', lease_reminder_job, REMINDER_INTERVAL_SECONDS)
+register_job('payment_reminders', payment_reminder_job, REMINDER_INTERVAL_SECONDS)
 
 # Start helper for scheduler
 def start_due_date_scheduler():
-    """Start the background reminder worker in a daemon thread."""
-    try:
-        thread = threading.Thread(target=due_date_reminder_worker, daemon=True)
-        thread.start()
-        print("Due date scheduler thread started")
-    except Exception as e:
-        print("Failed to start due date scheduler thread:", e)
+    """Start the persistent job scheduler (see scheduler.py) in a daemon thread.
+    Safe to call in every server process: each due job runs in exactly one of them."""
+    start_scheduler(app)
 
 # ---------------- ADMIN / DEBUG ROUTES ----------------
 @app.route('/admin/send-test-email', methods=['POST'])
@@ -683,12 +1539,17 @@ def admin_trigger_reminders():
     if current_user.role != 'ADMIN':
         return {"error": "Unauthorized"}, 403
 
-    with app.app_context():
-        results = due_date_check_once()
+    # Runs through the scheduler so it never overlaps a scheduled run and is recorded
+    ran, results, error = run_job('lease_reminders', force=True)
+    if not ran:
+        return {"error": "Reminder job is already running"}, 409
+    if error is not None:
+        return jsonify({"error": error, "results": results}), 500
     return jsonify(results)
 
 @app.route('/admin/reminder-summary', methods=['GET'])
 @login_required
+@conditional_get('tenants')
 def admin_reminder_summary():
     """Admin-only endpoint that returns how many tenants are leaving today and upcoming dates.
     Response JSON:
@@ -702,7 +1563,6 @@ def admin_reminder_summary():
         return {"error": "Unauthorized"}, 403
 
     try:
-        tenants = Tenant.query.all()
         lease_days = int(os.getenv('LEASE_LENGTH_DAYS', '30'))
         upcoming_days = int(os.getenv('REMINDER_UPCOMING_DAYS', '30'))
 
@@ -710,18 +1570,18 @@ def admin_reminder_summary():
         counts_by_date = {}
         leaving_today = 0
 
-        for t in tenants:
-            if not t.join_date:
-                continue
-            end_date = t.join_date + timedelta(days=lease_days)
-            days_left = (end_date - today).days
-            if days_left < 0:
-                continue
-            if days_left == 0:
-                leaving_today += 1
-            if 0 < days_left <= upcoming_days:
-                dstr = str(end_date)
-                counts_by_date[dstr] = counts_by_date.get(dstr, 0) + 1
+        # end_date = join_date + lease_days, so group by join_date inside the shifted window
+        rows = db.session.query(Tenant.join_date, func.count(Tenant.id)) \
+            .filter(Tenant.join_date >= today - timedelta(days=lease_days),
+                    Tenant.join_date <= today + timedelta(days=upcoming_days - lease_days)) \
+            .group_by(Tenant.join_date) \
+            .all()
+        for join_date, count in rows:
+            end_date = join_date + timedelta(days=lease_days)
+            if end_date == today:
+                leaving_today = count
+            else:
+                counts_by_date[str(end_date)] = count
 
         upcoming_list = [{"date": d, "count": counts_by_date[d]} for d in sorted(counts_by_date.keys())]
         total_upcoming = sum(counts_by_date.values())
@@ -744,37 +1604,31 @@ def admin_send_digest_email():
 
     try:
         # Gather tenant summary
-        tenants = Tenant.query.all()
         lease_days = int(os.getenv('LEASE_LENGTH_DAYS', '30'))
         upcoming_days = int(os.getenv('REMINDER_UPCOMING_DAYS', '30'))
         today = date.today()
+        window_end = today + timedelta(days=upcoming_days)
         leaving_today = 0
         tenant_upcoming = []
 
-        for t in tenants:
-            if not t.join_date:
-                continue
+        for t in tenants_ending_between(today, window_end, lease_days):
             end_date = t.join_date + timedelta(days=lease_days)
             days_left = (end_date - today).days
             if days_left == 0:
                 leaving_today += 1
-            if 0 < days_left <= upcoming_days:
+            else:
                 tenant_upcoming.append((t.name, end_date, days_left))
 
         # Gather payment summary
-        payments = Payment.query.filter_by(paid=False).all()
         pay_due_today = 0
         pay_upcoming = []
 
-        for p in payments:
-            if not p.due_date:
-                continue
+        for p in unpaid_payments_due_between(today, window_end):
             days_left = (p.due_date - today).days
             if days_left == 0:
                 pay_due_today += 1
-            if 0 < days_left <= upcoming_days:
-                tenant = Tenant.query.get(p.tenant_id)
-                pay_upcoming.append((tenant.name if tenant else 'N/A', p.due_date, p.amount, days_left))
+            else:
+                pay_upcoming.append((p.name if p.name is not None else 'N/A', p.due_date, p.amount, days_left))
 
         # Build email body
         body_lines = []
@@ -811,23 +1665,128 @@ def admin_send_digest_email():
         subject = f"PG Management - Daily Digest ({today})"
         body = '\n'.join(body_lines)
 
-        # Send to all admins
+        # Queue for all admins; the outbox sender delivers them over one connection
         admin_emails = [u.email for u in User.query.filter_by(role='ADMIN').all()]
-        sent_count = 0
-        for admin_email in admin_emails:
-            if send_email_smtp(admin_email, subject, body):
-                sent_count += 1
+        if admin_emails:
+            queue_emails([(admin_email, subject, body) for admin_email in admin_emails])
 
         return jsonify({
-            "message": "Digest email sent",
+            "message": "Digest email queued",
             "total_admins": len(admin_emails),
-            "sent": sent_count,
+            "queued": len(admin_emails),
             "date": str(today)
         }), 200
     except Exception as e:
         print('Error in admin_send_digest_email:', e)
         return {"error": str(e)}, 500
 
+@app.route('/admin/jobs', methods=['GET'])
+@login_required
+def admin_jobs():
+    """Admin-only: schedule, lock and last-run timing of every background job."""
+    if current_user.role != 'ADMIN':
+        return {"error": "Unauthorized"}, 403
+
+    def iso(value):
+        return value.isoformat() if value else None
+
+    jobs = ScheduledJob.query.order_by(ScheduledJob.name).all()
+    return jsonify([{
+        "name": j.name,
+        "interval_seconds": j.interval_seconds,
+        "next_run_at": iso(j.next_run_at),
+        "last_started_at": iso(j.last_started_at),
+        "last_finished_at": iso(j.last_finished_at),
+        "last_duration_ms": j.last_duration_ms,
+        "last_status": j.last_status,
+        "last_error": j.last_error,
+        "run_count": j.run_count,
+        "missed_runs": j.missed_runs,
+        "running": j.locked_until is not None and j.locked_until > datetime.utcnow(),
+        "locked_by": j.locked_by,
+        "locked_until": iso(j.locked_until)
+    } for j in jobs])
+
+@app.route('/admin/jobs/<name>/run', methods=['POST'])
+@login_required
+def admin_run_job(name):
+    """Admin-only: run a background job now (its regular schedule is kept)."""
+    if current_user.role != 'ADMIN':
+        return {"error": "Unauthorized"}, 403
+    if name not in JOBS:
+        return {"error": "Job not found"}, 404
+
+    ran, result, error = run_job(name, force=True)
+    if not ran:
+        return {"error": "Job is already running"}, 409
+    if error is not None:
+        return jsonify({"name": name, "error": error, "result": result}), 500
+    return jsonify({"name": name, "result": result})
+
+@app.route('/admin/outbox', methods=['GET'])
+@login_required
+def admin_outbox():
+    """Admin-only: outbox message counts by status, plus the latest failures."""
+    if current_user.role != 'ADMIN':
+        return {"error": "Unauthorized"}, 403
+
+    failed = EmailOutbox.query.filter_by(status='failed') \
+        .order_by(EmailOutbox.id.desc()).limit(20).all()
+    return jsonify({
+        "counts": outbox_counts(),
+        "recent_failures": [{
+            "id": m.id,
+            "to_email": m.to_email,
+            "subject": m.subject,
+            "attempts": m.attempts,
+            "last_error": m.last_error,
+            "created_at": m.created_at.isoformat() if m.created_at else None
+        } for m in failed]
+    })
+
+@app.route('/admin/outbox/flush', methods=['POST'])
+@login_required
+def admin_outbox_flush():
+    """Admin-only: deliver one batch of due outbox messages now and return the counts."""
+    if current_user.role != 'ADMIN':
+        return {"error": "Unauthorized"}, 403
+
+    return jsonify(send_due_batch())
+
+@app.route('/admin/slow-queries', methods=['GET'])
+@login_required
+def admin_slow_queries():
+    """Admin-only: worst slow statements seen since startup (see slow_queries.py).
+    Query params: limit (default 20), sort=total|max|count (default total)."""
+    if current_user.role != 'ADMIN':
+        return {"error": "Unauthorized"}, 403
+
+    sort = request.args.get('sort', 'total')
+    if sort not in ('total', 'max', 'count'):
+        return {"error": "sort must be total, max or count"}, 400
+    try:
+        limit = int(request.args.get('limit', '20'))
+    except ValueError:
+        return {"error": "limit must be an integer"}, 400
+    if limit < 1:
+        return {"error": "limit must be at least 1"}, 400
+
+    return jsonify({
+        "enabled": slow_query_threshold_ms() is not None,
+        "threshold_ms": slow_query_threshold_ms(),
+        "statements": slow_query_log.worst(limit, sort),
+    })
+
+@app.route('/admin/slow-queries', methods=['DELETE'])
+@login_required
+def admin_clear_slow_queries():
+    """Admin-only: forget the slow statements collected so far."""
+    if current_user.role != 'ADMIN':
+        return {"error": "Unauthorized"}, 403
+
+    slow_query_log.clear()
+    return {"message": "Slow-query log cleared"}
+
 if __name__ == "__main__":
     with app.app_context():
         db.create_all()
@@ -837,6 +1796,7 @@ if __name__ == "__main__":
         start_due_date_scheduler()
     except Exception as e:
         print("Failed to start reminder scheduler:", e)
+    start_outbox_sender(app)
     # Use localhost for development, 0.0.0.0 for production
     host = os.getenv('FLASK_HOST', 'localhost')
     port = int(os.getenv('FLASK_PORT', 8000))
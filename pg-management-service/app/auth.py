@@ -0,0 +1,136 @@
+"""Logged-in identity without a users-table lookup on every request.
+
+login() stores a SessionUser in the (signed) Flask session. Its id string
+carries the user id, role and a fingerprint of the role and password hash:
+"<id>:<role>:<fingerprint>". user_loader turns that back into a SessionUser
+from a small in-process TTL cache, so authenticated requests normally do not
+touch the users table at all.
+
+When a user's role or password changes the fingerprint changes, and sessions
+carrying the old one are rejected. Updates made through the ORM in this
+process drop the cache entry immediately; other processes notice within
+AUTH_CACHE_TTL_SECONDS.
+
+Environment variables:
+  AUTH_CACHE_TTL_SECONDS   how long a cached identity is trusted (default 60)
+  AUTH_CACHE_SIZE          most users kept in the cache (default 10000)
+"""
+
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event
+
+from models import db, User
+
+AUTH_CACHE_TTL_SECONDS = int(os.getenv('AUTH_CACHE_TTL_SECONDS', '60'))
+AUTH_CACHE_SIZE = int(os.getenv('AUTH_CACHE_SIZE', '10000'))
+
+
+class SessionUser(UserMixin):
+    """The parts of a User that request handlers read: id, email and role."""
+
+    def __init__(self, id, email, role, fingerprint):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.fingerprint = fingerprint
+
+    def get_id(self):
+        return f"{self.id}:{self.role}:{self.fingerprint}"
+
+
+class TTLCache:
+    """Thread-safe dict whose entries expire after ttl seconds (oldest evicted first)."""
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_identities = TTLCache(AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_SIZE)
+
+
+def credentials_fingerprint(role, password_hash):
+    """Changes whenever the role or the password does."""
+    key = current_app.config['SECRET_KEY'].encode()
+    return hmac.new(key, f"{role}:{password_hash}".encode(), hashlib.sha256).hexdigest()[:16]
+
+
+def session_user(user):
+    """SessionUser for a User row, to pass to login_user()."""
+    identity = SessionUser(user.id, user.email, user.role,
+                           credentials_fingerprint(user.role, user.password))
+    _identities.set(user.id, identity)
+    return identity
+
+
+def load_session_user(session_id):
+    """user_loader: SessionUser for a session id string, or None if it is no longer valid."""
+    user_id, _, rest = session_id.partition(':')
+    role, _, fingerprint = rest.partition(':')
+    try:
+        user_id = int(user_id)
+    except ValueError:
+        return None
+
+    identity = _identities.get(user_id)
+    if identity is None:
+        row = db.session.query(User.id, User.email, User.role, User.password) \
+            .filter(User.id == user_id) \
+            .first()
+        if not row:
+            return None
+        identity = SessionUser(row.id, row.email, row.role,
+                               credentials_fingerprint(row.role, row.password))
+        _identities.set(user_id, identity)
+
+    # Sessions created before this format only hold the id; they keep working
+    if fingerprint and (role != identity.role or fingerprint != identity.fingerprint):
+        return None
+    return identity
+
+
+def invalidate_user(user_id):
+    """Forget the cached identity; the next request re-reads the user."""
+    _identities.pop(user_id)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.id)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Compressed Streaming Check for PG Management System
+
+Serves the app over a real socket on a temporary SQLite database filled by
+seed_data.py, downloads the streamed exports once uncompressed and once with
+every encoding compression.py offers, and fails unless each compressed
+stream decodes to exactly the uncompressed bytes. It also fails on a
+Content-Length header that does not match the bytes sent (e.g. a literal
+"Content-Length: None"), which a browser or proxy would reject.
+
+Usage:
+  python3 check_compression.py
+  python3 check_compression.py --tenants 2000
+
+Exit code is 0 when every stream decodes, 1 otherwise.
+"""
+
+import argparse
+import gzip
+import http.client
+import os
+import sys
+import tempfile
+import threading
+from datetime import date
+
+ADMIN_EMAIL = 'admin@pg.com'
+ADMIN_PASSWORD = 'admin123'
+
+ENDPOINTS = [
+    '/export/payments?format=ndjson',
+    '/export/payments?format=csv',
+    '/export/tenants?format=csv',
+]
+
+
+def fetch(port, path, cookie, accept_encoding):
+    """(status, headers, raw body bytes) of GET path, with any chunked framing removed."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        conn.request('GET', path, headers={'Cookie': cookie, 'Accept-Encoding': accept_encoding})
+        response = conn.getresponse()
+        return response.status, response.headers, response.read()
+    finally:
+        conn.close()
+
+
+def decode(body, encoding):
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    import brotli
+    return brotli.decompress(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a compressed export stream does not decode")
+    parser.add_argument('--tenants', type=int, default=500, help="synthetic tenants to seed (default 500)")
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp(prefix='compression-check-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(temp_dir, 'check.db')}"
+    # Keep startup quick; the check does not exercise password hashing
+    os.environ.setdefault('PASSWORD_HASH_N', '16384')
+
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import app, db, init_sample_data
+    from compression import ENCODINGS
+    import seed_data
+
+    print("\n" + "=" * 70)
+    print("PG Management System - Compressed Streaming Check")
+    print("=" * 70)
+    if not ENCODINGS:
+        print("❌ No encodings enabled (check COMPRESS_ENCODINGS)")
+        sys.exit(1)
+
+    with app.app_context():
+        db.create_all()
+        init_sample_data()
+        seed_data.seed(db, argparse.Namespace(rooms=args.tenants, tenants=args.tenants, months=6,
+                                              seed=42, as_of=date.today()), log=None)
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+    print(f"Encodings: {', '.join(ENCODINGS)}; serving on 127.0.0.1:{port}")
+    print("=" * 70 + "\n")
+
+    failures = 0
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        conn.request('POST', '/login', body=f'{{"email": "{ADMIN_EMAIL}", "password": "{ADMIN_PASSWORD}"}}',
+                     headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        cookie = '; '.join(value.split(';', 1)[0] for name, value in response.getheaders()
+                           if name.lower() == 'set-cookie')
+        conn.close()
+        if response.status != 200 or not cookie:
+            print(f"❌ Admin login failed: HTTP {response.status}")
+            sys.exit(1)
+
+        for path in ENDPOINTS:
+            status, headers, expected = fetch(port, path, cookie, 'identity')
+            if status != 200 or not expected:
+                print(f"❌ {path}: HTTP {status} with {len(expected)} bytes uncompressed")
+                failures += 1
+                continue
+            print(f"{path}  ({len(expected):,} bytes uncompressed)")
+            for encoding in ENCODINGS:
+                status, headers, body = fetch(port, path, cookie, encoding)
+                problems = []
+                if status != 200:
+                    problems.append(f"HTTP {status}")
+                if headers.get('Content-Encoding') != encoding:
+                    problems.append(f"Content-Encoding is {headers.get('Content-Encoding')!r}")
+                length = headers.get('Content-Length')
+                if length is not None and length != str(len(body)):
+                    problems.append(f"Content-Length: {length} but {len(body)} bytes sent")
+                if not problems:
+                    try:
+                        if decode(body, encoding) != expected:
+                            problems.append("decodes to different bytes")
+                    except Exception as e:
+                        problems.append(f"does not decode: {e.__class__.__name__}: {e}")
+                print(f"  {'❌' if problems else '✅'} {encoding:<5}{len(body):>11,} bytes"
+                      + (f"  {'; '.join(problems)}" if problems else ''))
+                if problems:
+                    failures += 1
+    finally:
+        server.shutdown()
+
+    print("\n" + "=" * 70)
+    if failures:
+        print(f"❌ {failures} stream{'' if failures == 1 else 's'} failed")
+        sys.exit(1)
+    print("✅ Every compressed stream decodes to the uncompressed export")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Email Outbox Check for PG Management System
+
+Runs mailer.send_due_batch() against a stand-in SMTP server (plugged in
+through mailer.smtp_factory) on a temporary SQLite database, with the clock
+under the check's control, and fails unless:
+
+  - due messages are delivered over one connection and marked sent
+  - a failed send is retried after the backoff delay, on a new connection
+    when the old one dropped, and marked failed after OUTBOX_MAX_ATTEMPTS
+  - a sender whose conditional claim loses the race to another sender
+    claims nothing, so no message is sent twice
+
+Usage:
+  python3 check_outbox.py
+
+Exit code is 0 when every check passes, 1 otherwise.
+"""
+
+import os
+import smtplib
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import event
+
+import mailer
+from models import db, EmailOutbox
+
+START = datetime(2026, 1, 1, 9, 0, 0)
+
+
+class Clock:
+    """Stands in for mailer.utcnow."""
+
+    def __init__(self):
+        self.now = START
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+
+class FakeSMTP:
+    """Records what smtplib.SMTP would have sent. failures maps a recipient to
+    the exceptions its next send attempts raise, one per attempt."""
+
+    connections = 0
+    sent = []
+    failures = {}
+
+    def __init__(self, host, port, timeout=None):
+        FakeSMTP.connections += 1
+        self.open = True
+
+    @classmethod
+    def reset(cls, failures=None):
+        cls.connections, cls.sent, cls.failures = 0, [], failures or {}
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def send_message(self, msg):
+        if not self.open:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        pending = FakeSMTP.failures.get(msg['To'])
+        if pending:
+            error = pending.pop(0)
+            if isinstance(error, smtplib.SMTPServerDisconnected):
+                self.open = False
+            raise error
+        FakeSMTP.sent.append((msg['To'], msg['Subject']))
+
+    def quit(self):
+        self.open = False
+
+
+def queue(*recipients):
+    mailer.queue_emails([(to, f"Rent due for {to}", "Please pay your rent.") for to in recipients])
+
+
+def statuses():
+    return {m.to_email: (m.status, m.attempts) for m in EmailOutbox.query.order_by(EmailOutbox.id)}
+
+
+def reset_outbox(clock):
+    EmailOutbox.query.delete()
+    db.session.commit()
+    # Ids are reused after the delete; forget the old objects
+    db.session.expunge_all()
+    clock.now = START
+
+
+def check_send(clock, problems):
+    FakeSMTP.reset()
+    queue('a@example.com', 'b@example.com', 'c@example.com')
+    stats = mailer.send_due_batch()
+    if stats != {"claimed": 3, "sent": 3, "retrying": 0, "failed": 0}:
+        problems.append(f"stats {stats}")
+    if FakeSMTP.connections != 1:
+        problems.append(f"{FakeSMTP.connections} SMTP connections for one batch")
+    if [to for to, _ in FakeSMTP.sent] != ['a@example.com', 'b@example.com', 'c@example.com']:
+        problems.append(f"sent {FakeSMTP.sent}")
+    if set(statuses().values()) != {('sent', 1)}:
+        problems.append(f"statuses {statuses()}")
+    if mailer.send_due_batch()["claimed"] != 0:
+        problems.append("sent messages were claimed again")
+
+
+def check_retry(clock, problems):
+    FakeSMTP.reset({
+        'a@example.com': [smtplib.SMTPServerDisconnected("Connection unexpectedly closed")],
+        'c@example.com': [smtplib.SMTPRecipientsRefused({'c@example.com': (550, b'Mailbox busy')})]
+                         * mailer.OUTBOX_MAX_ATTEMPTS,
+    })
+    queue('a@example.com', 'b@example.com', 'c@example.com')
+    stats = mailer.send_due_batch()
+    if stats != {"claimed": 3, "sent": 1, "retrying": 2, "failed": 0}:
+        problems.append(f"first pass stats {stats}")
+    if FakeSMTP.connections != 2:
+        problems.append(f"{FakeSMTP.connections} connections; expected a reconnect after the drop")
+    if FakeSMTP.sent != [('b@example.com', 'Rent due for b@example.com')]:
+        problems.append(f"first pass sent {FakeSMTP.sent}")
+
+    # Not due again until the backoff has passed
+    clock.advance(mailer.OUTBOX_BACKOFF_SECONDS - 1)
+    if mailer.send_due_batch()["claimed"] != 0:
+        problems.append("retry claimed before the backoff delay")
+    clock.advance(1)
+    stats = mailer.send_due_batch()
+    if stats != {"claimed": 2, "sent": 1, "retrying": 1, "failed": 0}:
+        problems.append(f"retry stats {stats}")
+    if statuses()['a@example.com'] != ('sent', 2):
+        problems.append(f"a@example.com ended {statuses()['a@example.com']}")
+
+    # c@example.com keeps failing until it runs out of attempts
+    for _ in range(mailer.OUTBOX_MAX_ATTEMPTS):
+        clock.advance(mailer.OUTBOX_MAX_BACKOFF_SECONDS)
+        mailer.send_due_batch()
+    message = EmailOutbox.query.filter_by(to_email='c@example.com').one()
+    if (message.status, message.attempts) != ('failed', mailer.OUTBOX_MAX_ATTEMPTS):
+        problems.append(f"c@example.com ended ({message.status}, {message.attempts})")
+    if not message.last_error or 'Mailbox busy' not in message.last_error:
+        problems.append(f"last_error {message.last_error!r}")
+    times_sent = [to for to, _ in FakeSMTP.sent].count('a@example.com')
+    if times_sent != 1:
+        problems.append(f"a@example.com sent {times_sent} times")
+
+
+def check_claim_race(app, clock, problems):
+    """Sender B picks its ids, then sender A claims and sends them before B's UPDATE runs."""
+    FakeSMTP.reset()
+    queue('a@example.com', 'b@example.com')
+    results = {}
+
+    def run_sender_a(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('UPDATE EMAIL_OUTBOX') and 'a' not in results:
+            results['a'] = None
+            clock.advance(1)
+            # A new app context gets its own session and connection
+            with app.app_context():
+                results['a'] = mailer.send_due_batch()
+            clock.advance(-1)
+
+    event.listen(db.engine, 'before_cursor_execute', run_sender_a)
+    try:
+        results['b'] = mailer.send_due_batch()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', run_sender_a)
+
+    if not results.get('a') or results['a']["sent"] != 2:
+        problems.append(f"sender A {results.get('a')}")
+    if results['b']["claimed"] != 0:
+        problems.append(f"sender B also claimed: {results['b']}")
+    if sorted(to for to, _ in FakeSMTP.sent) != ['a@example.com', 'b@example.com']:
+        problems.append(f"sent {FakeSMTP.sent}")
+    db.session.expire_all()
+    if set(statuses().values()) != {('sent', 1)}:
+        problems.append(f"statuses {statuses()}")
+
+
+def main():
+    """Run the checks."""
+    temp_dir = tempfile.mkdtemp(prefix='outbox-check-')
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(temp_dir, 'outbox.db')}"
+    db.init_app(app)
+
+    os.environ.update({'SMTP_EMAIL': 'pg@example.com', 'SMTP_HOST': 'smtp.invalid',
+                       'SMTP_STARTTLS': 'false', 'SMTP_AUTH': 'false'})
+    clock = Clock()
+    mailer.smtp_factory = FakeSMTP
+    mailer.utcnow = clock
+
+    print("\n" + "=" * 70)
+    print("PG Management System - Email Outbox Check")
+    print("=" * 70)
+    print(f"Backoff {mailer.OUTBOX_BACKOFF_SECONDS}s, max {mailer.OUTBOX_MAX_ATTEMPTS} attempts")
+    print("=" * 70 + "\n")
+
+    checks = [
+        ("send: due messages delivered over one connection", lambda p: check_send(clock, p)),
+        ("retry: backoff, reconnect and giving up", lambda p: check_retry(clock, p)),
+        ("claim: a lost claim race sends nothing", lambda p: check_claim_race(app, clock, p)),
+    ]
+    failures = 0
+    with app.app_context():
+        db.create_all()
+        for name, check in checks:
+            reset_outbox(clock)
+            problems = []
+            try:
+                check(problems)
+            except Exception as e:
+                problems.append(f"{e.__class__.__name__}: {e}")
+            print(f"{'❌' if problems else '✅'} {name}")
+            for problem in problems:
+                print(f"     {problem}")
+            if problems:
+                failures += 1
+
+    print("\n" + "=" * 70)
+    if failures:
+        print(f"❌ {failures} check{'' if failures == 1 else 's'} failed")
+        sys.exit(1)
+    print("✅ Outbox sends, retries and claims as expected")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Query Plan Check for PG Management System
+
+Runs EXPLAIN QUERY PLAN on the hot queries used by app.py and the reminder
+workers, and fails if any of them falls back to a full table scan.
+
+By default the schema is built from models.py in an in-memory SQLite
+database, so this checks the indexes the models declare. Pass --database to
+check an existing database file instead (e.g. after running migrate_schema.py).
+
+Usage:
+  python3 check_query_plans.py
+  python3 check_query_plans.py --database database.db
+
+Exit code is 0 when every query uses an index, 1 otherwise.
+"""
+
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+
+from flask import Flask
+from sqlalchemy import func, text
+from models import db, User, Room, Tenant, Payment, Complaint
+from slow_queries import FULL_SCAN
+
+def hot_queries():
+    """(name, query) pairs mirroring the filtered lookups in app.py."""
+    today = date.today()
+    return [
+        ("login: user by email",
+         User.query.filter_by(email='admin@pg.com')),
+        ("tenant record for user",
+         Tenant.query.filter_by(user_id=1)),
+        ("tenants in room",
+         Tenant.query.filter_by(room_id=1)),
+        ("available rooms",
+         Room.query.filter_by(status='Available').order_by(Room.id)),
+        ("payments for tenant",
+         Payment.query.filter_by(tenant_id=1).order_by(Payment.id)),
+        ("unpaid payments due in window",
+         db.session.query(Payment.id, Payment.amount, Payment.due_date, Tenant.name)
+         .outerjoin(Tenant, Payment.tenant_id == Tenant.id)
+         .filter(Payment.paid == False, Payment.due_date >= today,
+                 Payment.due_date <= today + timedelta(days=30))),
+        ("payment summary by due date",
+         db.session.query(Payment.due_date, func.count(Payment.id))
+         .filter(Payment.paid == False, Payment.due_date >= today,
+                 Payment.due_date <= today + timedelta(days=30))
+         .group_by(Payment.due_date)),
+        ("lease end window",
+         db.session.query(Tenant.join_date, func.count(Tenant.id))
+         .filter(Tenant.join_date >= today - timedelta(days=30), Tenant.join_date <= today)
+         .group_by(Tenant.join_date)),
+        ("complaints for tenant",
+         Complaint.query.filter_by(tenant_id=1).order_by(Complaint.id)),
+        ("complaint triage queue",
+         Complaint.query.filter(Complaint.status == 'Pending', Complaint.id > 0).order_by(Complaint.id)),
+    ]
+
+def explain(query):
+    """Return the EXPLAIN QUERY PLAN detail lines for a SQLAlchemy query."""
+    sql = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+    rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    return [row[-1] for row in rows]
+
+def main():
+    """Run the check."""
+    parser = argparse.ArgumentParser(description="Fail if a hot query does a full table scan")
+    parser.add_argument('--database', help="SQLite file to check instead of a fresh schema from models.py")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    if args.database:
+        if not os.path.exists(args.database):
+            print("❌ Database file not found at:", args.database)
+            sys.exit(1)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.abspath(args.database)}'
+    else:
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    print("\n" + "=" * 70)
+    print("PG Management System - Query Plan Check")
+    print("=" * 70)
+    print(f"Database: {args.database or 'in-memory schema from models.py'}")
+    print("=" * 70 + "\n")
+
+    failures = 0
+    with app.app_context():
+        if not args.database:
+            db.create_all()
+        for name, query in hot_queries():
+            try:
+                plan = explain(query)
+            except Exception as e:
+                # e.g. an unmigrated database missing a column
+                print(f"❌ {name}")
+                print(f"     Error: {e.__class__.__name__}: {str(e).splitlines()[0]}")
+                failures += 1
+                continue
+            scans = [line for line in plan if FULL_SCAN.match(line)]
+            print(f"{'❌' if scans else '✅'} {name}")
+            for line in plan:
+                print(f"     {line}")
+            if scans:
+                failures += 1
+
+    print("\n" + "=" * 70)
+    if failures:
+        print(f"❌ {failures} hot quer{'y' if failures == 1 else 'ies'} failed (table scan or error)")
+        sys.exit(1)
+    print("✅ All hot queries use an index")
+    sys.exit(0)
+
+if __name__ == '__main__':
+    main()
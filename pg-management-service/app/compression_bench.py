@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Response Compression Benchmark for PG Management System
+
+Fetches the main pages, list endpoints and exports uncompressed, then
+compresses each body with every encoding compression.py can produce and
+reports the bytes saved and the CPU time it cost. Streamed endpoints (exports)
+are compressed chunk by chunk, exactly as compression.py streams them.
+
+By default a temporary SQLite database is filled by seed_data.py with
+--tenants synthetic tenants (with rooms, payments and complaints) so the
+numbers reflect a realistically sized PG. Pass --database to measure an existing database file
+instead. Settings such as COMPRESS_GZIP_LEVEL and COMPRESS_BROTLI_QUALITY are
+read from the environment as usual.
+
+Usage:
+  python3 compression_bench.py
+  python3 compression_bench.py --tenants 2000 --repeat 20
+  python3 compression_bench.py --database database.db
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+ADMIN_EMAIL = 'admin@pg.com'
+ADMIN_PASSWORD = 'admin123'
+
+ENDPOINTS = [
+    '/',
+    '/static/js/app.js',
+    '/rooms',
+    '/users',
+    '/tenants',
+    '/payments',
+    '/complaints',
+    '/dashboard/stats',
+    '/export/tenants?format=csv',
+    '/export/payments?format=ndjson',
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure response compression per endpoint")
+    parser.add_argument('--database', help="existing SQLite file to read instead of a seeded temporary one")
+    parser.add_argument('--tenants', type=int, default=500, help="synthetic tenants to seed (default 500)")
+    parser.add_argument('--repeat', type=int, default=10, help="compressions per measurement (default 10)")
+    return parser.parse_args()
+
+
+def cpu_ms(fn, repeat):
+    """Median CPU milliseconds of fn() over repeat runs."""
+    times = []
+    for _ in range(repeat):
+        started = time.process_time()
+        fn()
+        times.append((time.process_time() - started) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    args = parse_args()
+    if args.database:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.abspath(args.database)}"
+    else:
+        temp_dir = tempfile.mkdtemp(prefix='compression-bench-')
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(temp_dir, 'bench.db')}"
+    # Keep startup quick; the benchmark does not measure password hashing
+    os.environ.setdefault('PASSWORD_HASH_N', '16384')
+
+    from app import app, db, init_sample_data
+    import seed_data
+    from compression import (COMPRESS_BROTLI_QUALITY, COMPRESS_MIN_BYTES, COMPRESS_GZIP_LEVEL, ENCODINGS,
+                             compress_body, iter_compressed)
+
+    print("=" * 86)
+    print("Response compression benchmark")
+    print("=" * 86)
+    if not ENCODINGS:
+        print("❌ No encodings enabled (check COMPRESS_ENCODINGS)")
+        sys.exit(1)
+
+    with app.app_context():
+        db.create_all()
+        init_sample_data()
+        if not args.database:
+            # One room per tenant; the seeder leaves about 10% of them as past tenants
+            seed_data.seed(db, argparse.Namespace(rooms=args.tenants, tenants=args.tenants, months=3,
+                                                  seed=42, as_of=date.today()), log=None)
+            print(f"Seeded {args.tenants} tenants into {os.environ['DATABASE_URL']}")
+
+    print(f"Encodings: {', '.join(ENCODINGS)} (gzip level {COMPRESS_GZIP_LEVEL}, "
+          f"brotli quality {COMPRESS_BROTLI_QUALITY}); CPU is the median of {args.repeat} runs\n")
+
+    client = app.test_client()
+    response = client.post('/login', json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD})
+    if response.status_code != 200:
+        print(f"❌ Admin login failed: {response.status_code} {response.get_json()}")
+        sys.exit(1)
+
+    print(f"{'Endpoint':<40}{'Raw':>10}  {'Enc':<5}{'Compressed':>11}{'Saved':>8}{'CPU ms':>9}")
+    print("-" * 86)
+    totals = {encoding: [0, 0.0] for encoding in ENCODINGS}
+    total_raw = 0
+    for path in ENDPOINTS:
+        response = client.get(path, headers={'Accept-Encoding': 'identity'}, buffered=False)
+        # Generator responses have no Content-Length and are compressed in streaming mode
+        streamed = response.content_length is None
+        chunks = list(response.iter_encoded())
+        response.close()
+        if response.status_code != 200:
+            print(f"{path:<40}  skipped (HTTP {response.status_code})")
+            continue
+        body = b''.join(chunks)
+        total_raw += len(body)
+        if len(body) < COMPRESS_MIN_BYTES and not streamed:
+            print(f"{path:<40}{len(body):>10,}  sent uncompressed (below COMPRESS_MIN_BYTES={COMPRESS_MIN_BYTES})")
+            for encoding in ENCODINGS:
+                totals[encoding][0] += len(body)
+            continue
+
+        for i, encoding in enumerate(ENCODINGS):
+            if streamed:
+                compress = lambda: b''.join(iter_compressed(chunks, encoding))
+            else:
+                compress = lambda: compress_body(body, encoding)
+            size = len(compress())
+            cost = cpu_ms(compress, args.repeat)
+            totals[encoding][0] += size
+            totals[encoding][1] += cost
+            saved = 100 * (1 - size / len(body)) if body else 0
+            label = f"{path}{' (stream)' if streamed else ''}" if i == 0 else ''
+            raw = f"{len(body):,}" if i == 0 else ''
+            print(f"{label:<40}{raw:>10}  {encoding:<5}{size:>11,}{saved:>7.1f}%{cost:>9.2f}")
+
+    print("-" * 86)
+    for encoding, (size, cost) in totals.items():
+        saved = 100 * (1 - size / total_raw) if total_raw else 0
+        print(f"{'Total':<40}{total_raw:>10,}  {encoding:<5}{size:>11,}{saved:>7.1f}%{cost:>9.2f}")
+    print("\n✅ Done")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""Streaming bulk import helpers (CSV / NDJSON).
+
+Records are read from the upload one line at a time, validated as they
+arrive, and inserted in chunks of IMPORT_CHUNK_SIZE rows, each chunk in its
+own transaction. Memory stays bounded by the chunk size and the (capped)
+error list, whatever the size of the file.
+
+The entity-specific parts (row validation, chunk-level checks against the
+database, the insert itself) are passed in by the route in app.py.
+"""
+
+import codecs
+import csv
+import io
+import json
+import os
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))
+# Per-row errors kept in the response; the failed count is always exact
+IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', '1000'))
+
+
+class RowError(ValueError):
+    """A row that failed validation; the message goes into the error report."""
+
+
+class FileError(ValueError):
+    """The file cannot be read past line (not UTF-8, or broken CSV)."""
+
+    def __init__(self, line, message):
+        super().__init__(message)
+        self.line = line
+
+
+def clean_text(record, key, required=False, max_length=None):
+    """String field (stripped); None when empty and not required."""
+    value = record.get(key)
+    value = str(value).strip() if value is not None else ''
+    if not value:
+        if required:
+            raise RowError(f"{key} is required")
+        return None
+    if max_length and len(value) > max_length:
+        raise RowError(f"{key} must be at most {max_length} characters")
+    return value
+
+
+def clean_int(record, key, required=False):
+    """Integer field; None when empty and not required."""
+    value = clean_text(record, key, required)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise RowError(f"{key} must be an integer")
+
+
+def clean_date(record, key):
+    """Optional YYYY-MM-DD field."""
+    value = clean_text(record, key)
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise RowError(f"{key} must be a date in YYYY-MM-DD format")
+
+
+def clean_bool(record, key, default=False):
+    """true/false, 1/0 or yes/no field (JSON booleans accepted as-is)."""
+    value = record.get(key)
+    if isinstance(value, bool):
+        return value
+    value = clean_text(record, key)
+    if value is None:
+        return default
+    if value.lower() in ('true', '1', 'yes'):
+        return True
+    if value.lower() in ('false', '0', 'no'):
+        return False
+    raise RowError(f"{key} must be true or false")
+
+
+def detect_format(content_type, filename=None, requested=None):
+    """Return 'csv' or 'ndjson' from ?format=, the file name or the Content-Type."""
+    if requested:
+        if requested not in ('csv', 'ndjson'):
+            raise ValueError("format must be csv or ndjson")
+        return requested
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if name.endswith('.csv'):
+        return 'csv'
+    if content_type and ('ndjson' in content_type or 'json' in content_type):
+        return 'ndjson'
+    return 'csv'
+
+
+def iter_records(stream, fmt):
+    """Yield (line_no, record) from a binary stream without reading it all.
+
+    record is a dict of column -> value, or a RowError if the line could not be
+    parsed. Blank lines are skipped. Raises FileError at the first line that
+    cannot be read at all.
+    """
+    if isinstance(stream, io.RawIOBase):
+        # Werkzeug's request stream is unbuffered, so readline() would read byte by byte
+        stream = io.BufferedReader(stream, 64 * 1024)
+    lines = codecs.iterdecode(iter(stream.readline, b''), 'utf-8-sig')
+    if fmt == 'ndjson':
+        line_no = 0
+        try:
+            for line_no, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_no, RowError(f"Invalid JSON: {e}")
+                    continue
+                if not isinstance(record, dict):
+                    yield line_no, RowError("Each line must be a JSON object")
+                    continue
+                yield line_no, record
+        except UnicodeDecodeError:
+            # Raised while fetching the line after line_no
+            raise FileError(line_no + 1, "File is not valid UTF-8") from None
+    else:
+        reader = csv.DictReader(lines)
+        try:
+            for record in reader:
+                if not any((v or '').strip() for v in record.values() if isinstance(v, str)):
+                    continue
+                yield reader.line_num, {k.strip(): v for k, v in record.items() if k is not None}
+        except UnicodeDecodeError:
+            # The csv reader's own count (DictReader's lags until a row succeeds);
+            # the undecodable line never reached it, so is not counted yet
+            raise FileError(reader.reader.line_num + 1, "File is not valid UTF-8") from None
+        except csv.Error as e:
+            raise FileError(reader.reader.line_num, f"Invalid CSV: {e}") from None
+
+
+def run_import(session, records, validate_row, check_chunk, insert_chunk, chunk_size=None):
+    """Validate and insert records in chunked transactions.
+
+    validate_row(record) -> clean row dict, raising RowError for bad input.
+    check_chunk(rows) -> {index: message} for rows that conflict with the
+        database (unknown references, duplicates); may also fill in ids.
+    insert_chunk(rows) inserts the remaining rows (executemany); it may raise
+        RowError when a conflict only shows up at write time.
+
+    If a chunk still hits an IntegrityError (e.g. a concurrent write), it is
+    rolled back and retried row by row so only the offending rows fail.
+
+    If the file itself cannot be read further (not UTF-8, or broken CSV such
+    as a NUL byte), the import stops there: rows read before it are still
+    inserted and report["file_error"] says where reading failed.
+    Returns the report dict sent back to the client.
+    """
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+    report = {"inserted": 0, "failed": 0, "errors": [], "errors_truncated": False, "file_error": None}
+
+    def fail(line_no, message):
+        report["failed"] += 1
+        if len(report["errors"]) < IMPORT_MAX_ERRORS:
+            report["errors"].append({"line": line_no, "error": message})
+        else:
+            report["errors_truncated"] = True
+
+    def flush(chunk):
+        rows = [row for _, row in chunk]
+        conflicts = check_chunk(rows)
+        ready = []
+        for i, (line_no, row) in enumerate(chunk):
+            if i in conflicts:
+                fail(line_no, conflicts[i])
+            else:
+                ready.append((line_no, row))
+        if not ready:
+            session.rollback()
+            return
+        try:
+            insert_chunk([row for _, row in ready])
+            session.commit()
+            report["inserted"] += len(ready)
+            return
+        except (IntegrityError, RowError):
+            session.rollback()
+        for line_no, row in ready:
+            try:
+                conflict = check_chunk([row])
+                if conflict:
+                    raise RowError(conflict[0])
+                insert_chunk([row])
+                session.commit()
+                report["inserted"] += 1
+            except (IntegrityError, RowError) as e:
+                session.rollback()
+                fail(line_no, str(e.orig) if isinstance(e, IntegrityError) else str(e))
+
+    chunk = []
+    records = iter(records)
+    while True:
+        try:
+            line_no, record = next(records)
+        except StopIteration:
+            break
+        except FileError as e:
+            report["file_error"] = {"line": e.line, "error": f"{e}; import stopped"}
+            break
+        if isinstance(record, RowError):
+            fail(line_no, str(record))
+            continue
+        try:
+            chunk.append((line_no, validate_row(record)))
+        except RowError as e:
+            fail(line_no, str(e))
+            continue
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+    return report
@@ -0,0 +1,72 @@
+"""Fast JSON for API responses.
+
+FastJSONProvider replaces Flask's default JSON provider with orjson, which
+encodes straight to bytes and handles date, datetime and UUID values itself.
+Dates come out as "YYYY-MM-DD" and datetimes in ISO 8601, the same strings
+str()/isoformat() produce, so handlers can return the values read from the
+database as they are. Keys are not sorted; clients must not depend on the
+order.
+
+orjson is optional: without it the provider falls back to the standard json
+module with the same date handling.
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json
+    orjson = None
+
+
+def _default(value):
+    """Types orjson (or json) cannot encode by themselves, encoded as Flask does."""
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(JSONProvider):
+    """orjson-backed JSON provider; set app.json = FastJSONProvider(app)."""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            kwargs.setdefault('default', _default)
+            return json.dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS
+        # Like Flask's provider: indented in debug mode, compact otherwise
+        if self._app.debug:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def response(self, *args, **kwargs):
+        """Like jsonify(): serialize the arguments into an application/json response."""
+        obj = self._prepare_response_obj(args, kwargs)
+        if orjson is None:
+            body = json.dumps(obj, default=_default, indent=2 if self._app.debug else None,
+                              separators=None if self._app.debug else (',', ':'))
+            return self._app.response_class(f"{body}\n", mimetype=self.mimetype)
+        body = orjson.dumps(obj, default=_default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+HTTP Load Benchmark for PG Management System
+
+Drives the key endpoints of a running server with concurrent clients and
+records, per scenario, the throughput, p50/p90/p99 latency, the status codes
+and the SQL statements run per request. It writes them to a JSON baseline
+that later runs can be compared against.
+
+SQL counts are the difference in db_statements_total (see metrics.py) for the
+scenario's route, read from the server's /metrics before and after the
+scenario. They are only exact when the server runs as a single process.
+/metrics is read with the benchmark's admin session, so no token is needed;
+--metrics-token sends the server's METRICS_TOKEN instead.
+
+Scenarios run one after the other. The write scenarios (/register, the
+reminder pass and the digest email) change the data, so they run last and
+--read-only skips them. Reseed to get back to the same starting point.
+
+Typical run:
+  python3 seed_data.py --scale large --reset
+  python3 app.py                                  # in another terminal
+  python3 load_bench.py --output baseline.json
+  ... change something, restart the app, reseed ...
+  python3 load_bench.py --compare baseline.json --fail-over 20
+
+Exit code is 0 on success. It is 1 if the server cannot be reached, or if
+--fail-over is given and some scenario's p99 got worse by more than that
+percentage compared with the baseline.
+"""
+
+import argparse
+import http.cookiejar
+import json
+import math
+import platform
+import re
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from seed_data import SEED_EMAIL_DOMAIN, SEED_PASSWORD
+
+ADMIN_EMAIL = 'admin@pg.com'
+ADMIN_PASSWORD = 'admin123'
+TENANT_EMAIL = f'tenant000001@{SEED_EMAIL_DOMAIN}'
+
+# name, role, method, path, route (URL rule, for the SQL counts)
+READ_SCENARIOS = [
+    ("tenants_page", "admin", "GET", "/tenants?limit=100", "/tenants"),
+    ("tenants_all", "admin", "GET", "/tenants", "/tenants"),
+    ("rooms_all", "admin", "GET", "/rooms", "/rooms"),
+    ("payments_page", "admin", "GET", "/payments?limit=100", "/payments"),
+    ("payments_unpaid", "admin", "GET", "/payments?paid=false&limit=100", "/payments"),
+    ("payments_own", "tenant", "GET", "/payments", "/payments"),
+    ("complaints_open", "admin", "GET", "/complaints?status=open&limit=100", "/complaints"),
+    ("dashboard_stats", "admin", "GET", "/dashboard/stats", "/dashboard/stats"),
+    ("payment_summary", "admin", "GET", "/admin/payment-summary", "/admin/payment-summary"),
+    ("reminder_summary", "admin", "GET", "/admin/reminder-summary", "/admin/reminder-summary"),
+]
+
+_DB_STATEMENTS = re.compile(r'^db_statements_total\{route="((?:[^"\\]|\\.)*)"\} (\S+)$', re.MULTILINE)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concurrent HTTP benchmark of the key endpoints")
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--requests', type=int, default=200, help="requests per read scenario (default 200)")
+    parser.add_argument('--concurrency', type=int, default=8, help="parallel clients (default 8)")
+    parser.add_argument('--warmup', type=int, default=3, help="unrecorded requests before each read scenario")
+    parser.add_argument('--registrations', type=int, default=50, help="POST /register requests (default 50)")
+    parser.add_argument('--job-runs', type=int, default=3,
+                        help="serial runs of the reminder pass and of the digest (default 3)")
+    parser.add_argument('--only', help="comma-separated scenario names to run")
+    parser.add_argument('--read-only', action='store_true', help="skip the scenarios that write")
+    parser.add_argument('--metrics-token', help="Bearer token for /metrics (the server's METRICS_TOKEN); default: admin session")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="baseline JSON file to compare against")
+    parser.add_argument('--fail-over', type=float,
+                        help="with --compare: exit 1 if any p99 is more than this %% slower")
+    return parser.parse_args()
+
+
+class Client:
+    """urllib opener with its own cookie jar (one login session per client)."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def call(self, method, path, payload=None, headers=None):
+        """Send a request; returns (status, body bytes)."""
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json', **(headers or {})})
+        try:
+            with self.opener.open(req, timeout=120) as resp:
+                return resp.status, resp.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def login(self, email, password):
+        status, body = self.call('POST', '/login', {'email': email, 'password': password})
+        if status != 200:
+            raise RuntimeError(f"login as {email} failed ({status}): {body[:200]!r}")
+        return self
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def statement_counts(admin, token):
+    """db_statements_total per route from the server's /metrics, or None if unavailable."""
+    headers = {'Authorization': f'Bearer {token}'} if token else None
+    status, body = admin.call('GET', '/metrics', headers=headers)
+    if status != 200:
+        return None
+    return {route: float(value) for route, value in _DB_STATEMENTS.findall(body.decode())}
+
+
+def run_scenario(clients, requests, concurrency, route, admin, token, warmup=0):
+    """Send each of requests ((method, path, payload) tuples) with concurrency parallel
+    clients, taken round-robin from clients. Returns the result dict."""
+    for method, path, payload in requests[:warmup]:
+        clients[0].call(method, path, payload)
+    requests = requests[warmup:]
+
+    before = statement_counts(admin, token)
+    latencies, statuses = [], Counter()
+    lock = threading.Lock()
+
+    def send(index):
+        method, path, payload = requests[index]
+        client = clients[index % len(clients)]
+        started = time.perf_counter()
+        try:
+            status, _ = client.call(method, path, payload)
+        except Exception as e:
+            status = type(e).__name__
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed_ms)
+            statuses[str(status)] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, range(len(requests))))
+    wall = time.perf_counter() - started
+    after = statement_counts(admin, token)
+
+    latencies.sort()
+    sql = None
+    if before is not None and after is not None and requests:
+        sql = round((after.get(route, 0) - before.get(route, 0)) / len(requests), 1)
+    return {
+        "method": requests[0][0] if requests else None,
+        "path": requests[0][1] if requests else None,
+        "route": route,
+        "requests": len(requests),
+        "concurrency": concurrency,
+        "status_counts": dict(statuses),
+        "errors": sum(n for status, n in statuses.items() if not status.startswith(('2', '3'))),
+        "throughput_rps": round(len(requests) / wall, 1) if wall else None,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 2) if latencies else None,
+            "p50": round(percentile(latencies, 50), 2) if latencies else None,
+            "p90": round(percentile(latencies, 90), 2) if latencies else None,
+            "p99": round(percentile(latencies, 99), 2) if latencies else None,
+            "max": round(latencies[-1], 2) if latencies else None,
+        },
+        "sql_per_request": sql,
+    }
+
+
+def write_scenarios(args, admin):
+    """(name, role, requests, concurrency, route) for the scenarios that change data."""
+    _, body = admin.call('GET', '/rooms?fields=id,status')
+    available = [r["id"] for r in json.loads(body) if r["status"] == "Available"]
+    run_id = int(time.time())
+    registrations = [
+        ("POST", "/register", {"email": f"bench{run_id}-{i}@{SEED_EMAIL_DOMAIN}", "password": SEED_PASSWORD,
+                               "name": f"Bench Tenant {i}", "phone": "9000000000", "room_id": room_id})
+        for i, room_id in enumerate(available[:args.registrations])
+    ]
+    if len(registrations) < args.registrations:
+        print(f"⚠️  Only {len(registrations)} available rooms; running that many registrations")
+    return [
+        ("register", None, registrations, args.concurrency, "/register"),
+        # Jobs take a lease, so concurrent runs would just get 409s
+        ("reminder_pass", "admin", [("POST", "/admin/trigger-reminders", None)] * args.job_runs, 1,
+         "/admin/trigger-reminders"),
+        ("digest_email", "admin", [("POST", "/admin/send-digest-email", None)] * args.job_runs, 1,
+         "/admin/send-digest-email"),
+    ]
+
+
+def compare(results, baseline_path, fail_over):
+    """Print the change against a baseline file; returns True if a p99 regressed past fail_over."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["scenarios"]
+    print(f"\nCompared with {baseline_path}:")
+    print(f"{'Scenario':<20}{'p50 ms':>22}{'p99 ms':>22}{'req/s':>22}{'SQL/req':>16}")
+    regressed = False
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+
+        def change(new_value, old_value):
+            if new_value is None or not old_value:
+                return ''
+            return f"{old_value:g}→{new_value:g} ({100 * (new_value - old_value) / old_value:+.0f}%)"
+
+        p99, old_p99 = result["latency_ms"]["p99"], old["latency_ms"]["p99"]
+        worse = fail_over is not None and p99 is not None and old_p99 and 100 * (p99 - old_p99) / old_p99 > fail_over
+        regressed = regressed or worse
+        print(f"{name:<20}{change(result['latency_ms']['p50'], old['latency_ms']['p50']):>22}"
+              f"{change(p99, old_p99):>22}{change(result['throughput_rps'], old['throughput_rps']):>22}"
+              f"{change(result['sql_per_request'], old['sql_per_request']):>16}{'  ❌' if worse else ''}")
+    return regressed
+
+
+def main():
+    args = parse_args()
+    base_url = args.base_url.rstrip('/')
+    only = set(args.only.split(',')) if args.only else None
+
+    print("=" * 86)
+    print("PG Management System - HTTP Load Benchmark")
+    print("=" * 86)
+    try:
+        admin = Client(base_url).login(ADMIN_EMAIL, ADMIN_PASSWORD)
+        sessions = {
+            "admin": [Client(base_url).login(ADMIN_EMAIL, ADMIN_PASSWORD) for _ in range(args.concurrency)],
+            "tenant": [Client(base_url).login(TENANT_EMAIL, SEED_PASSWORD) for _ in range(args.concurrency)],
+            None: [Client(base_url) for _ in range(args.concurrency)],
+        }
+    except (RuntimeError, OSError) as e:
+        print(f"❌ {e}")
+        print("   Is the app running at", base_url, "on a database filled by seed_data.py?")
+        sys.exit(1)
+
+    _, body = admin.call('GET', '/dashboard/stats')
+    dataset = json.loads(body)
+    if statement_counts(admin, args.metrics_token) is None:
+        print("⚠️  /metrics not readable with the admin session or --metrics-token; SQL counts will be missing")
+    print(f"Server: {base_url}; {args.concurrency} clients, {args.requests} requests per read scenario\n")
+    print(f"{'Scenario':<20}{'Requests':>9}{'Errors':>8}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}"
+          f"{'p99 ms':>10}{'SQL/req':>9}")
+    print("-" * 86)
+
+    scenarios = [(name, role, [(method, path, None)] * (args.requests + args.warmup), args.concurrency, route)
+                 for name, role, method, path, route in READ_SCENARIOS]
+    if not args.read_only:
+        scenarios += write_scenarios(args, admin)
+
+    results = {}
+    for name, role, requests, concurrency, route in scenarios:
+        if only is not None and name not in only:
+            continue
+        warmup = args.warmup if requests and requests[0][0] == 'GET' else 0
+        result = run_scenario(sessions[role], requests, concurrency, route, admin, args.metrics_token, warmup)
+        results[name] = result
+        latency = result["latency_ms"]
+        sql = '' if result["sql_per_request"] is None else f"{result['sql_per_request']:g}"
+        print(f"{name:<20}{result['requests']:>9}{result['errors']:>8}{result['throughput_rps'] or 0:>10.1f}"
+              f"{latency['p50'] or 0:>10.1f}{latency['p90'] or 0:>10.1f}{latency['p99'] or 0:>10.1f}{sql:>9}")
+
+    print("-" * 86)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "created_at": datetime.now().isoformat(timespec='seconds'),
+                "base_url": base_url,
+                "python": platform.python_version(),
+                "settings": {"requests": args.requests, "concurrency": args.concurrency,
+                             "warmup": args.warmup, "registrations": args.registrations,
+                             "job_runs": args.job_runs},
+                "dataset": dataset,
+                "scenarios": results,
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    regressed = compare(results, args.compare, args.fail_over) if args.compare else False
+    if regressed:
+        print(f"\n❌ p99 latency regressed by more than {args.fail_over:g}%")
+        sys.exit(1)
+    print("\n✅ Done")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
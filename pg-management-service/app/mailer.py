@@ -0,0 +1,254 @@
+"""Email delivery for the PG Management backend.
+
+Request handlers and reminder jobs call queue_email(), which only writes a row
+to the email_outbox table. A background sender (start_outbox_sender) claims due
+messages in batches and delivers each batch over a single authenticated SMTP
+connection. Failed messages are retried with exponential backoff and marked
+failed after OUTBOX_MAX_ATTEMPTS.
+
+Environment variables:
+  SMTP_EMAIL / SMTP_PASSWORD   sender account (required unless SMTP_AUTH=false)
+  SMTP_HOST / SMTP_PORT        default smtp.gmail.com:587
+  SMTP_STARTTLS                default true; set false for a local relay/stand-in
+  SMTP_AUTH                    default true; set false to skip LOGIN
+  OUTBOX_BATCH_SIZE            messages per connection (default 50)
+  OUTBOX_MAX_ATTEMPTS          default 5
+  OUTBOX_BACKOFF_SECONDS       first retry delay, doubled per attempt (default 30)
+  OUTBOX_MAX_BACKOFF_SECONDS   default 3600
+  OUTBOX_POLL_SECONDS          idle poll interval of the sender (default 30)
+  OUTBOX_WORKERS               sender threads per process (default 1)
+"""
+
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from metrics import EMAIL_SEND_SECONDS
+from models import db, EmailOutbox
+
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+OUTBOX_BACKOFF_SECONDS = int(os.getenv('OUTBOX_BACKOFF_SECONDS', '30'))
+OUTBOX_MAX_BACKOFF_SECONDS = int(os.getenv('OUTBOX_MAX_BACKOFF_SECONDS', '3600'))
+OUTBOX_POLL_SECONDS = int(os.getenv('OUTBOX_POLL_SECONDS', '30'))
+OUTBOX_WORKERS = int(os.getenv('OUTBOX_WORKERS', '1'))
+# A message stuck in "sending" this long (e.g. the process died) is picked up again
+OUTBOX_SENDING_LEASE_SECONDS = 300
+
+# Replaced by check_outbox.py (and any test) to talk to an SMTP stand-in
+smtp_factory = smtplib.SMTP
+
+# Set when a message is queued so an idle sender in this process wakes up early
+_wakeup = threading.Event()
+
+
+def smtp_settings():
+    return {
+        'user': os.getenv('SMTP_EMAIL'),
+        'password': os.getenv('SMTP_PASSWORD'),
+        'host': os.getenv('SMTP_HOST', 'smtp.gmail.com'),
+        'port': int(os.getenv('SMTP_PORT', 587)),
+        'starttls': os.getenv('SMTP_STARTTLS', 'true').lower() != 'false',
+        'auth': os.getenv('SMTP_AUTH', 'true').lower() != 'false',
+    }
+
+
+def smtp_configured(settings):
+    return bool(settings['user'] and (settings['password'] or not settings['auth']))
+
+
+def open_smtp_connection(settings):
+    """Connect, STARTTLS and log in once; the caller sends any number of messages."""
+    server = smtp_factory(settings['host'], settings['port'], timeout=30)
+    try:
+        if settings['starttls']:
+            server.starttls()
+        if settings['auth']:
+            server.login(settings['user'], settings['password'])
+    except Exception:
+        close_smtp_connection(server)
+        raise
+    return server
+
+
+def close_smtp_connection(server):
+    try:
+        server.quit()
+    except Exception:
+        pass
+
+
+def build_message(settings, to_email, subject, body):
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    msg['From'] = settings['user']
+    msg['To'] = to_email
+    msg.set_content(body)
+    return msg
+
+
+def send_email_smtp(to_email, subject, body):
+    """Send one email synchronously. Prints log if SMTP is not configured.
+    Used for the admin test email; everything else goes through queue_email()."""
+    settings = smtp_settings()
+    if not smtp_configured(settings):
+        print("SMTP not configured (SMTP_EMAIL/SMTP_PASSWORD missing). Skipping email to:", to_email)
+        return False
+
+    started = time.perf_counter()
+    try:
+        server = open_smtp_connection(settings)
+        try:
+            server.send_message(build_message(settings, to_email, subject, body))
+        finally:
+            close_smtp_connection(server)
+        EMAIL_SEND_SECONDS.observe(time.perf_counter() - started, result='sent')
+        print(f"Reminder email sent to {to_email}")
+        return True
+    except Exception as e:
+        EMAIL_SEND_SECONDS.observe(time.perf_counter() - started, result='failed')
+        print(f"Failed to send email to {to_email}: {e}")
+        return False
+
+
+def utcnow():
+    """Naive UTC timestamp, matching the DateTime columns."""
+    return datetime.utcnow()
+
+
+def queue_email(to_email, subject, body):
+    """Queue one email for background delivery and commit."""
+    queue_emails([(to_email, subject, body)])
+
+
+def queue_emails(messages):
+    """Queue (to_email, subject, body) tuples in one transaction."""
+    now = utcnow()
+    db.session.add_all([
+        EmailOutbox(to_email=to_email, subject=subject, body=body,
+                    status='queued', next_attempt_at=now, created_at=now)
+        for to_email, subject, body in messages
+    ])
+    db.session.commit()
+    _wakeup.set()
+
+
+def _schedule_retry(message, error, now):
+    message.attempts += 1
+    message.last_error = str(error)[:300]
+    if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+        message.status = 'failed'
+        print(f"Giving up on email {message.id} to {message.to_email}: {error}")
+        return
+    delay = min(OUTBOX_BACKOFF_SECONDS * 2 ** (message.attempts - 1), OUTBOX_MAX_BACKOFF_SECONDS)
+    message.status = 'queued'
+    message.next_attempt_at = now + timedelta(seconds=delay)
+
+
+def send_due_batch(limit=None):
+    """Claim up to limit due messages and deliver them over one SMTP connection.
+    Returns counts: {"claimed": n, "sent": n, "retrying": n, "failed": n}.
+    Safe to run from several threads or processes at once: each message is
+    claimed with a conditional UPDATE, so only one sender gets it."""
+    limit = limit or OUTBOX_BATCH_SIZE
+    stats = {"claimed": 0, "sent": 0, "retrying": 0, "failed": 0}
+    now = utcnow()
+    due = EmailOutbox.status.in_(('queued', 'sending')) & (EmailOutbox.next_attempt_at <= now)
+
+    ids = [i for (i,) in db.session.query(EmailOutbox.id).filter(due)
+           .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(limit)]
+    if not ids:
+        return stats
+    lease_until = now + timedelta(seconds=OUTBOX_SENDING_LEASE_SECONDS)
+    EmailOutbox.query.filter(EmailOutbox.id.in_(ids), due).update(
+        {"status": "sending", "next_attempt_at": lease_until}, synchronize_session=False
+    )
+    db.session.commit()
+    messages = EmailOutbox.query.filter(
+        EmailOutbox.id.in_(ids),
+        EmailOutbox.status == 'sending',
+        EmailOutbox.next_attempt_at == lease_until
+    ).order_by(EmailOutbox.id).all()
+    stats["claimed"] = len(messages)
+    if not messages:
+        return stats
+
+    settings = smtp_settings()
+    if not smtp_configured(settings):
+        print(f"SMTP not configured (SMTP_EMAIL/SMTP_PASSWORD missing). Dropping {len(messages)} queued email(s)")
+        for message in messages:
+            message.status = 'failed'
+            message.last_error = 'SMTP not configured'
+        db.session.commit()
+        stats["failed"] = len(messages)
+        return stats
+
+    server = None
+    try:
+        for message in messages:
+            # Includes (re)connecting when the message needs a new connection
+            started = time.perf_counter()
+            try:
+                if server is None:
+                    server = open_smtp_connection(settings)
+                server.send_message(build_message(settings, message.to_email, message.subject, message.body))
+                message.status = 'sent'
+                message.attempts += 1
+                message.sent_at = utcnow()
+                message.last_error = None
+                stats["sent"] += 1
+                EMAIL_SEND_SECONDS.observe(time.perf_counter() - started, result='sent')
+                print(f"Reminder email sent to {message.to_email}")
+            except Exception as e:
+                EMAIL_SEND_SECONDS.observe(time.perf_counter() - started, result='failed')
+                print(f"Failed to send email to {message.to_email}: {e}")
+                _schedule_retry(message, e, utcnow())
+                stats["failed" if message.status == 'failed' else "retrying"] += 1
+                # Reconnect for the next message if the connection is gone
+                if server is None or isinstance(e, (smtplib.SMTPServerDisconnected, OSError)):
+                    if server is not None:
+                        close_smtp_connection(server)
+                    server = None
+            # Commit per message so a crash never re-sends what already went out
+            db.session.commit()
+    finally:
+        if server is not None:
+            close_smtp_connection(server)
+    return stats
+
+
+def outbox_counts():
+    """Number of outbox messages per status."""
+    return dict(
+        db.session.query(EmailOutbox.status, db.func.count(EmailOutbox.id))
+        .group_by(EmailOutbox.status).all()
+    )
+
+
+def outbox_sender_worker(app):
+    """Background loop: deliver due messages, then sleep until woken or the poll interval."""
+    print("Email outbox sender started: polling every", OUTBOX_POLL_SECONDS, "seconds")
+    while True:
+        _wakeup.wait(OUTBOX_POLL_SECONDS)
+        _wakeup.clear()
+        try:
+            with app.app_context():
+                # Keep going while batches come back full
+                while send_due_batch()["claimed"] >= OUTBOX_BATCH_SIZE:
+                    pass
+        except Exception as e:
+            print("Error in outbox sender:", e)
+
+
+def start_outbox_sender(app):
+    """Start the outbox sender threads (daemon)."""
+    try:
+        for _ in range(OUTBOX_WORKERS):
+            threading.Thread(target=outbox_sender_worker, args=(app,), daemon=True).start()
+        _wakeup.set()  # deliver anything left over from a previous run
+        print("Email outbox sender thread(s) started")
+    except Exception as e:
+        print("Failed to start email outbox sender:", e)
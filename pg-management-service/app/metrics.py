@@ -0,0 +1,226 @@
+"""Request, SQL and background-work metrics in Prometheus text format.
+
+register_metrics(app) times every request and serves GET /metrics.
+register_query_metrics(engine) counts the SQL statements each request runs
+and the time spent in them, using the before/after_cursor_execute events. A
+handler that issues one query per row shows up at once as a jump in
+http_request_db_statements for its route. Statements run outside a request,
+by the scheduler or the outbox sender, are recorded under the route
+"(background)".
+
+The mailer and the scheduler record email send times (email_send_seconds)
+and job run times, including the reminder jobs (job_run_seconds).
+
+Routes are labelled by their URL rule ("/tenants/<int:tenant_id>/payments"),
+not the path, so the number of series stays small. Latency is measured until
+the view returns its response. For streamed responses such as exports it
+does not include sending the body.
+
+Metrics live in process memory and start from zero on restart. With several
+server processes, each one reports its own numbers; Prometheus adds them up.
+
+GET /metrics is for logged-in admins, like the other admin endpoints. For a
+Prometheus scraper, set METRICS_TOKEN and have it send the token as a Bearer
+token.
+
+Environment variables:
+  METRICS_TOKEN  if set, "Authorization: Bearer <token>" also grants access to GET /metrics
+"""
+
+import bisect
+import hmac
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+JOB_BUCKETS = (0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250)
+
+BACKGROUND_ROUTE = '(background)'
+UNMATCHED_ROUTE = '(unmatched)'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    """Histogram with fixed buckets and optional labels."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield (f'{self.name}_bucket',
+                       _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))]), cumulative)
+            yield f'{self.name}_sum', _format_labels(self.labelnames, key), total
+            yield f'{self.name}_count', _format_labels(self.labelnames, key), count
+
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Time to handle a request, by route and status.',
+    ('method', 'route', 'status'))
+REQUEST_DB_STATEMENTS = Histogram(
+    'http_request_db_statements', 'SQL statements run per request.',
+    ('route',), QUERY_COUNT_BUCKETS)
+REQUEST_DB_SECONDS = Histogram(
+    'http_request_db_seconds', 'Time spent in SQL per request.', ('route',))
+DB_STATEMENTS = Counter(
+    'db_statements_total', 'SQL statements run, by the route that issued them.', ('route',))
+DB_SECONDS = Counter(
+    'db_statement_seconds_total', 'Time spent in SQL, by the route that issued it.', ('route',))
+EMAIL_SEND_SECONDS = Histogram(
+    'email_send_seconds', 'Time to hand one email to the SMTP server, by result.', ('result',))
+JOB_RUN_SECONDS = Histogram(
+    'job_run_seconds', 'Duration of scheduled job runs (reminders included), by job and status.',
+    ('job', 'status'), JOB_BUCKETS)
+
+METRICS = [REQUEST_SECONDS, REQUEST_DB_STATEMENTS, REQUEST_DB_SECONDS, DB_STATEMENTS, DB_SECONDS,
+           EMAIL_SEND_SECONDS, JOB_RUN_SECONDS]
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in METRICS:
+        lines.append(f'# HELP {metric.name} {metric.help}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for name, labels, value in metric.samples():
+            lines.append(f'{name}{labels} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def current_route():
+    """Route label for the statement or request being recorded."""
+    if not has_request_context():
+        return BACKGROUND_ROUTE
+    return request.url_rule.rule if request.url_rule is not None else UNMATCHED_ROUTE
+
+
+def register_query_metrics(engine):
+    """Count statements and their time on engine, per route and per request."""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        # Kept on the execution context: after_cursor_execute does not fire if the
+        # statement fails, and a stale timer there is simply dropped with the context
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _record_statement(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_metrics_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        route = current_route()
+        DB_STATEMENTS.inc(route=route)
+        DB_SECONDS.inc(elapsed, route=route)
+        if has_request_context() and 'metrics_started' in g:
+            g.metrics_db_statements += 1
+            g.metrics_db_seconds += elapsed
+
+
+def _authorized():
+    if current_user.is_authenticated and current_user.role == 'ADMIN':
+        return True
+    if not METRICS_TOKEN:
+        return False
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(token.strip(), METRICS_TOKEN)
+
+
+def metrics_view():
+    if not _authorized():
+        # Same answers as login_required plus the ADMIN check on the other admin endpoints
+        if current_user.is_authenticated:
+            return {"error": "Unauthorized"}, 403
+        return {"error": "Unauthorized - Please login first"}, 401
+    return render_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+def register_metrics(app):
+    """Time every request on app and serve the metrics at GET /metrics."""
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_db_statements = 0
+        g.metrics_db_seconds = 0.0
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        route = current_route()
+        REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method,
+                                route=route, status=str(response.status_code))
+        REQUEST_DB_STATEMENTS.observe(g.metrics_db_statements, route=route)
+        REQUEST_DB_SECONDS.observe(g.metrics_db_seconds, route=route)
+        return response
+
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
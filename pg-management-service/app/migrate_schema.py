@@ -10,6 +10,18 @@ New columns added in recent updates:
   - tenants.id_info (VARCHAR(300), nullable)
   - payments.due_date (DATE, nullable)
 
+New indexes added in recent updates:
+  - complaints(status, id)
+  - complaints(tenant_id, status)
+  - payments(paid, due_date)
+  - tenants(user_id), tenants(room_id), tenants(join_date)
+  - rooms(status)
+  - payments(tenant_id, month) UNIQUE (fails if duplicate rent rows exist;
+    remove the duplicates and re-run)
+
+Indexes dropped in recent updates:
+  - payments(tenant_id): covered by the unique payments(tenant_id, month)
+
 Usage:
   python3 migrate_schema.py
 
@@ -17,7 +29,9 @@ The script will:
   1. Check if the database file exists
   2. For each new column, check if it already exists
   3. If missing, add the column with default values (NULL for nullable columns)
-  4. Report results and any errors
+  4. Create any missing indexes (CREATE INDEX IF NOT EXISTS)
+  5. Drop indexes that are no longer used (DROP INDEX IF EXISTS)
+  6. Report results and any errors
 
 No data is lost or modified in existing rows.
 """
@@ -50,6 +64,67 @@ MIGRATIONS = [
     },
 ]
 
+# Keep in sync with the db.Index entries declared in models.py
+INDEX_MIGRATIONS = [
+    {
+        'name': 'ix_complaints_status_id',
+        'table': 'complaints',
+        'columns': 'status, id',
+        'description': 'Complaint triage queue by status'
+    },
+    {
+        'name': 'ix_complaints_tenant_id_status',
+        'table': 'complaints',
+        'columns': 'tenant_id, status',
+        'description': 'Complaints per tenant'
+    },
+    {
+        'name': 'ix_payments_paid_due_date',
+        'table': 'payments',
+        'columns': 'paid, due_date',
+        'description': 'Unpaid payments by due date (reminders)'
+    },
+    {
+        'name': 'ix_tenants_user_id',
+        'table': 'tenants',
+        'columns': 'user_id',
+        'description': 'Tenant record for a user'
+    },
+    {
+        'name': 'ix_tenants_room_id',
+        'table': 'tenants',
+        'columns': 'room_id',
+        'description': 'Tenants in a room'
+    },
+    {
+        'name': 'ix_tenants_join_date',
+        'table': 'tenants',
+        'columns': 'join_date',
+        'description': 'Lease end-date windows (reminders)'
+    },
+    {
+        'name': 'ix_rooms_status',
+        'table': 'rooms',
+        'columns': 'status',
+        'description': 'Rooms by status'
+    },
+    {
+        'name': 'uq_payments_tenant_id_month',
+        'table': 'payments',
+        'columns': 'tenant_id, month',
+        'unique': True,
+        'description': 'One rent row per tenant per month'
+    },
+]
+
+# Redundant indexes created by earlier versions of this script
+DROPPED_INDEXES = [
+    {
+        'name': 'ix_payments_tenant_id',
+        'description': 'Payments per tenant; uq_payments_tenant_id_month covers it'
+    },
+]
+
 def column_exists(conn, table, column):
     """Check if a column exists in a table."""
     cursor = conn.cursor()
@@ -76,6 +151,27 @@ def add_column(conn, table, column, definition):
     except Exception as e:
         return False, str(e)
 
+def create_index(conn, name, table, columns, unique=False):
+    """Create an index if it does not exist yet."""
+    cursor = conn.cursor()
+    try:
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        cursor.execute(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({columns})")
+        conn.commit()
+        return True, "Index ready"
+    except Exception as e:
+        return False, str(e)
+
+def drop_index(conn, name):
+    """Drop an index if it exists."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.commit()
+        return True, "Index dropped (or already absent)"
+    except Exception as e:
+        return False, str(e)
+
 def main():
     """Run migration."""
     print("\n" + "=" * 70)
@@ -103,7 +199,7 @@ def main():
         existing_tables = [row[0] for row in cursor.fetchall()]
         print(f"Found {len(existing_tables)} tables: {', '.join(existing_tables)}\n")
 
-        total_migrations = len(MIGRATIONS)
+        total_migrations = len(MIGRATIONS) + len(INDEX_MIGRATIONS) + len(DROPPED_INDEXES)
         successful = 0
         skipped = 0
 
@@ -142,6 +238,42 @@ def main():
 
             print()
 
+        for i, migration in enumerate(INDEX_MIGRATIONS, len(MIGRATIONS) + 1):
+            name = migration['name']
+            table = migration['table']
+
+            print(f"[{i}/{total_migrations}] index {name} ON {table} ({migration['columns']})")
+            print(f"  Description: {migration['description']}")
+
+            if table not in existing_tables:
+                print(f"  ⚠️  Table '{table}' does not exist (may be created on next app startup)")
+                skipped += 1
+                print()
+                continue
+
+            success, message = create_index(conn, name, table, migration['columns'],
+                                            migration.get('unique', False))
+            if success:
+                print(f"  ✅ Success: {message}")
+                successful += 1
+            else:
+                print(f"  ❌ Failed: {message}")
+
+            print()
+
+        for i, migration in enumerate(DROPPED_INDEXES, len(MIGRATIONS) + len(INDEX_MIGRATIONS) + 1):
+            print(f"[{i}/{total_migrations}] drop index {migration['name']}")
+            print(f"  Description: {migration['description']}")
+
+            success, message = drop_index(conn, migration['name'])
+            if success:
+                print(f"  ✅ Success: {message}")
+                successful += 1
+            else:
+                print(f"  ❌ Failed: {message}")
+
+            print()
+
         conn.close()
 
         # Summary
@@ -1,6 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from datetime import date
+from datetime import date, datetime
 
 db = SQLAlchemy()
 
@@ -12,6 +12,8 @@ class User(UserMixin, db.Model):
     password = db.Column(db.String(200), nullable=False)
     role = db.Column(db.String(20), nullable=False)  # ADMIN / TENANT
 
+    tenant = db.relationship("Tenant", back_populates="user", uselist=False)
+
 class Room(db.Model):
     __tablename__ = "rooms"
 
@@ -19,25 +21,39 @@ class Room(db.Model):
     room_no = db.Column(db.String(20), unique=True, nullable=False)
     room_type = db.Column(db.String(50))
     rent = db.Column(db.Integer)
-    status = db.Column(db.String(20), default="Available")
+    status = db.Column(db.String(20), default="Available", index=True)
+
+    tenants = db.relationship("Tenant", back_populates="room")
 
 class Tenant(db.Model):
     __tablename__ = "tenants"
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
     name = db.Column(db.String(100))
     phone = db.Column(db.String(15))
-    join_date = db.Column(db.Date, default=date.today)
-    room_id = db.Column(db.Integer, db.ForeignKey("rooms.id"))
+    join_date = db.Column(db.Date, default=date.today, index=True)
+    room_id = db.Column(db.Integer, db.ForeignKey("rooms.id"), index=True)
     # Personal info for admin (optional)
     address = db.Column(db.String(300), nullable=True)
     id_info = db.Column(db.String(300), nullable=True)
 
+    user = db.relationship("User", back_populates="tenant")
+    room = db.relationship("Room", back_populates="tenants")
+    payments = db.relationship("Payment", back_populates="tenant")
+    complaints = db.relationship("Complaint", back_populates="tenant")
+
 class Payment(db.Model):
     __tablename__ = "payments"
+    __table_args__ = (
+        # Reminder windows: WHERE paid = 0 AND due_date BETWEEN ? AND ?
+        db.Index("ix_payments_paid_due_date", "paid", "due_date"),
+        # One rent row per tenant per month; makes bulk generation idempotent
+        db.Index("uq_payments_tenant_id_month", "tenant_id", "month", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
+    # No index of its own: uq_payments_tenant_id_month leads with tenant_id
     tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id"))
     month = db.Column(db.String(20))  # Jan 2026
     amount = db.Column(db.Integer)
@@ -45,11 +61,66 @@ class Payment(db.Model):
     # Optional due date for payment reminders
     due_date = db.Column(db.Date, nullable=True)
 
+    tenant = db.relationship("Tenant", back_populates="payments")
+
 class Complaint(db.Model):
     __tablename__ = "complaints"
+    __table_args__ = (
+        # Triage queue: WHERE status = ? ORDER BY id
+        db.Index("ix_complaints_status_id", "status", "id"),
+        # Per-tenant view: WHERE tenant_id = ? [AND status = ?]; also serves tenant_id lookups
+        db.Index("ix_complaints_tenant_id_status", "tenant_id", "status"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.Integer, db.ForeignKey("tenants.id"))
     category = db.Column(db.String(100))
     description = db.Column(db.String(300))
     status = db.Column(db.String(20), default="Pending")
+
+    tenant = db.relationship("Tenant", back_populates="complaints")
+
+class EmailOutbox(db.Model):
+    """Queued outgoing email, delivered by the background sender in mailer.py."""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Sender poll: WHERE status IN (...) AND next_attempt_at <= now
+        db.Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(100), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued / sending / sent / failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.String(300), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+class ScheduledJob(db.Model):
+    """Schedule and lease lock of a background job, shared by all app processes (see scheduler.py)."""
+    __tablename__ = "scheduled_jobs"
+
+    name = db.Column(db.String(50), primary_key=True)
+    interval_seconds = db.Column(db.Integer, nullable=False)
+    next_run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_started_at = db.Column(db.DateTime, nullable=True)
+    last_finished_at = db.Column(db.DateTime, nullable=True)
+    last_duration_ms = db.Column(db.Integer, nullable=True)
+    last_status = db.Column(db.String(20), nullable=True)  # ok / error
+    last_error = db.Column(db.String(300), nullable=True)
+    run_count = db.Column(db.Integer, nullable=False, default=0)
+    missed_runs = db.Column(db.Integer, nullable=False, default=0)
+    # Lease lock: the process in locked_by owns the job until locked_until
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+
+class TableVersion(db.Model):
+    """Write counter per table, bumped on every commit that changed it (see versioning.py)."""
+    __tablename__ = "table_versions"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
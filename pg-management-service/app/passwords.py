@@ -0,0 +1,173 @@
+"""Password hashing for the PG Management backend.
+
+Passwords are hashed with scrypt in werkzeug's format ("scrypt:N:r:p$salt$hash"),
+so check_password_hash can still verify them. The cost N is calibrated by a
+built-in benchmark: it is the largest power of two whose p99 hashing time
+stays under PASSWORD_HASH_TARGET_MS while every worker in the pool is busy.
+Plain-text and weaker legacy hashes are still accepted, and needs_rehash tells
+the caller when to replace them after a successful login.
+
+Hashing runs on a bounded thread pool (hashlib's scrypt releases the GIL), so
+a burst of logins uses at most PASSWORD_HASH_WORKERS cores and
+PASSWORD_HASH_WORKERS * 128 * N * r bytes of memory. Excess callers wait for
+a queue slot and get PasswordHasherBusy after PASSWORD_HASH_QUEUE_TIMEOUT.
+
+The app calibrates once when it is created, so every server process spends a
+few seconds benchmarking at startup. Run `python3 passwords.py` to see the
+benchmark for this machine, then set PASSWORD_HASH_N to its result to skip it.
+
+Environment variables:
+  PASSWORD_HASH_TARGET_MS        p99 target for one hash (default 250)
+  PASSWORD_HASH_N                fixed scrypt N, skips calibration (power of two)
+  PASSWORD_HASH_WORKERS          concurrent hashes (default: CPU count, at most 4)
+  PASSWORD_HASH_QUEUE            callers allowed to wait for a worker (default 4 per worker)
+  PASSWORD_HASH_QUEUE_TIMEOUT    seconds a caller waits for a queue slot (default 5)
+"""
+
+import hmac
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+PASSWORD_HASH_TARGET_MS = int(os.getenv('PASSWORD_HASH_TARGET_MS', '250'))
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', str(4 * PASSWORD_HASH_WORKERS)))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', '5'))
+
+# scrypt block size and parallelism; only N is calibrated
+SCRYPT_R = 8
+SCRYPT_P = 1
+# Calibration never goes below 2^14 (16 MiB) or above 2^17 (128 MiB per hash)
+MIN_LOG2_N = 14
+MAX_LOG2_N = 17
+CALIBRATION_SAMPLES = 5
+
+HASH_PREFIXES = ('scrypt:', 'pbkdf2:')
+
+
+class PasswordHasherBusy(Exception):
+    """Too many hashes are queued; the caller should answer 503 and let the client retry."""
+
+
+_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
+_calibration_lock = threading.Lock()
+_scrypt_n = None
+
+
+def _method(n):
+    return f"scrypt:{n}:{SCRYPT_R}:{SCRYPT_P}"
+
+
+def _timed_hash(n):
+    started = time.perf_counter()
+    generate_password_hash('calibration-password', method=_method(n))
+    return (time.perf_counter() - started) * 1000
+
+
+def benchmark(n, samples=CALIBRATION_SAMPLES):
+    """p99 milliseconds of hashing with cost n, with every pool worker busy."""
+    times = sorted(_pool.map(_timed_hash, [n] * (samples * PASSWORD_HASH_WORKERS)))
+    return times[math.ceil(0.99 * len(times)) - 1]
+
+
+def calibrate(verbose=False):
+    """Pick the scrypt N for this machine (or PASSWORD_HASH_N) and return it."""
+    global _scrypt_n
+    with _calibration_lock:
+        if _scrypt_n is not None:
+            return _scrypt_n
+        fixed = os.getenv('PASSWORD_HASH_N')
+        if fixed:
+            _scrypt_n = int(fixed)
+            return _scrypt_n
+
+        chosen = 2 ** MIN_LOG2_N
+        for log2_n in range(MIN_LOG2_N, MAX_LOG2_N + 1):
+            p99 = benchmark(2 ** log2_n)
+            if verbose:
+                print(f"  N=2^{log2_n}: p99 {p99:.1f} ms")
+            if p99 > PASSWORD_HASH_TARGET_MS:
+                if log2_n == MIN_LOG2_N:
+                    print(f"Password hashing: minimum cost already takes {p99:.0f} ms (target {PASSWORD_HASH_TARGET_MS} ms)")
+                break
+            chosen = 2 ** log2_n
+        _scrypt_n = chosen
+        print(f"Password hashing: scrypt N={chosen}, r={SCRYPT_R}, p={SCRYPT_P} "
+              f"(target p99 {PASSWORD_HASH_TARGET_MS} ms, {PASSWORD_HASH_WORKERS} worker(s))")
+        return _scrypt_n
+
+
+def _run(fn, *args):
+    """Run fn on the hashing pool, waiting at most PASSWORD_HASH_QUEUE_TIMEOUT for a slot."""
+    if not _slots.acquire(timeout=PASSWORD_HASH_QUEUE_TIMEOUT):
+        raise PasswordHasherBusy("Too many password checks in progress")
+    try:
+        return _pool.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password):
+    """Hash a password with the calibrated cost."""
+    return _run(generate_password_hash, password, _method(calibrate()))
+
+
+def is_hashed(stored):
+    return stored.startswith(HASH_PREFIXES)
+
+
+def verify_password(stored, password):
+    """Check password against a stored hash (or legacy plain-text value)."""
+    if not stored or not isinstance(password, str):
+        return False
+    if is_hashed(stored):
+        try:
+            return _run(check_password_hash, stored, password)
+        except PasswordHasherBusy:
+            raise
+        except Exception:
+            return False
+    # Legacy plain-text password
+    return hmac.compare_digest(stored.encode(), password.encode())
+
+
+def needs_rehash(stored):
+    """True if stored is plain text or weaker than the current settings."""
+    if not stored.startswith('scrypt:'):
+        return True
+    try:
+        n, r, p = (int(v) for v in stored.split('$', 1)[0].split(':')[1:4])
+    except ValueError:
+        return True
+    return n < calibrate() or (r, p) != (SCRYPT_R, SCRYPT_P)
+
+
+# Verified against when the email is unknown, so a miss takes as long as a wrong password
+_dummy_hash = None
+
+
+def dummy_verify(password):
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password('not-a-real-password')
+    verify_password(_dummy_hash, password)
+
+
+def main():
+    print("=" * 60)
+    print("Password hashing benchmark")
+    print("=" * 60)
+    print(f"Target p99: {PASSWORD_HASH_TARGET_MS} ms, workers: {PASSWORD_HASH_WORKERS}")
+    n = calibrate(verbose=True)
+    print(f"✅ Use PASSWORD_HASH_N={n} to skip calibration at startup")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
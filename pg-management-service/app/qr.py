@@ -0,0 +1,35 @@
+"""Server-side QR code rendering for payment links.
+
+Rendered images are kept in an LRU cache keyed by payment URL and format, so
+repeated views of the same QR code cost a cache lookup rather than a render.
+
+Environment variables:
+  QR_CACHE_SIZE   rendered images kept in memory (default 1024)
+  QR_SCALE        pixels per QR module in PNGs (default 8)
+"""
+
+import hashlib
+import io
+import os
+from functools import lru_cache
+
+import segno
+
+QR_CACHE_SIZE = int(os.getenv('QR_CACHE_SIZE', '1024'))
+QR_SCALE = int(os.getenv('QR_SCALE', '8'))
+# Cache-Control max-age for served images; a payment URL always renders the same image
+QR_MAX_AGE_SECONDS = 365 * 24 * 60 * 60
+
+QR_MIMETYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def render_qr(payment_url, fmt='png'):
+    """Return (image bytes, etag) for a QR code encoding payment_url."""
+    buffer = io.BytesIO()
+    segno.make(payment_url, error='m').save(buffer, kind=fmt, scale=QR_SCALE, border=4)
+    body = buffer.getvalue()
+    return body, hashlib.sha1(body).hexdigest()
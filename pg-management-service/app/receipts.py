@@ -0,0 +1,207 @@
+"""PDF receipts.
+
+A receipt is rendered once and cached on disk: the file name includes a hash
+of the receipt contents, so an edit to the tenant or payment produces a new
+file while an unchanged receipt is always served from the cache. Only paid
+receipts are cached; pending ones are still changing.
+
+Month batches are streamed as a ZIP. Receipts missing from the cache are
+rendered in parallel on a process pool, a slice at a time, and each PDF is
+written to the client as soon as it is ready. The pool's workers are spawned
+fresh rather than forked from the server, which may hold locks, DB
+connections and other threads at the time. PDFs are already compressed, so
+they are stored in the ZIP as they are.
+
+Environment variables:
+  RECEIPT_CACHE_DIR   where rendered PDFs are kept (default app/receipt_cache)
+  RECEIPT_WORKERS     processes used to render batches (default: CPU count;
+                      1 renders in the request thread)
+"""
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from reportlab.lib.pagesizes import A5
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+RECEIPT_CACHE_DIR = os.getenv(
+    'RECEIPT_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'receipt_cache')
+)
+RECEIPT_WORKERS = int(os.getenv('RECEIPT_WORKERS', str(os.cpu_count() or 1)))
+# Receipts handed to the pool at a time; bounds memory of a batch download
+RECEIPT_BATCH_SLICE = 64
+
+# Fields that change with the day a receipt is viewed, left out of the cache key
+_VOLATILE_FIELDS = ('receipt_date', 'payment_date')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+RECEIPT_LINES = [
+    ("Receipt No", 'receipt_number'),
+    ("Receipt Date", 'receipt_date'),
+    ("Tenant", 'tenant_name'),
+    ("Email", 'tenant_email'),
+    ("Phone", 'tenant_phone'),
+    ("Room", 'room_no'),
+    ("Room Type", 'room_type'),
+    ("Month", 'payment_month'),
+    ("Amount", 'rent_amount'),
+    ("Status", 'payment_status'),
+    ("Payment Date", 'payment_date'),
+]
+
+
+def render_receipt_pdf(data):
+    """Render one receipt dict (as returned by GET /receipts/<id>) to PDF bytes."""
+    buffer = io.BytesIO()
+    width, height = A5
+    pdf = canvas.Canvas(buffer, pagesize=A5, pageCompression=1)
+    pdf.setTitle(f"Receipt {data['receipt_number']}")
+
+    y = height - 20 * mm
+    pdf.setFont("Helvetica-Bold", 16)
+    pdf.drawCentredString(width / 2, y, data['organization'])
+    y -= 8 * mm
+    pdf.setFont("Helvetica", 11)
+    pdf.drawCentredString(width / 2, y, "Payment Receipt")
+    y -= 6 * mm
+    pdf.line(15 * mm, y, width - 15 * mm, y)
+    y -= 10 * mm
+
+    for label, key in RECEIPT_LINES:
+        value = data.get(key)
+        if key == 'rent_amount' and value is not None:
+            value = f"Rs. {value}"
+        pdf.setFont("Helvetica-Bold", 10)
+        pdf.drawString(20 * mm, y, f"{label}:")
+        pdf.setFont("Helvetica", 10)
+        pdf.drawString(55 * mm, y, str(value) if value is not None else "N/A")
+        y -= 7 * mm
+
+    y -= 5 * mm
+    pdf.line(15 * mm, y, width - 15 * mm, y)
+    pdf.setFont("Helvetica-Oblique", 8)
+    pdf.drawCentredString(width / 2, y - 6 * mm, "This is a computer generated receipt.")
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def receipt_filename(data):
+    return f"{data['receipt_number']}.pdf"
+
+
+def _cache_path(data):
+    stable = {k: v for k, v in data.items() if k not in _VOLATILE_FIELDS}
+    digest = hashlib.sha1(json.dumps(stable, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return os.path.join(RECEIPT_CACHE_DIR, f"{data['receipt_number']}-{digest}.pdf")
+
+
+def _is_cacheable(data):
+    return data['payment_status'] == 'PAID'
+
+
+def _read_cached(data):
+    if not _is_cacheable(data):
+        return None
+    try:
+        with open(_cache_path(data), 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_cached(data, pdf):
+    if not _is_cacheable(data):
+        return
+    path = _cache_path(data)
+    os.makedirs(RECEIPT_CACHE_DIR, exist_ok=True)
+    # Write then rename so a concurrent reader never sees a partial file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(pdf)
+    os.replace(tmp_path, path)
+
+
+def receipt_pdf(data):
+    """PDF bytes for one receipt, from the disk cache when possible."""
+    pdf = _read_cached(data)
+    if pdf is None:
+        pdf = render_receipt_pdf(data)
+        _write_cached(data, pdf)
+    return pdf
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=RECEIPT_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _render_many(receipts):
+    """Render receipts in parallel (in order); falls back to this process if the pool fails."""
+    if RECEIPT_WORKERS <= 1 or len(receipts) <= 1:
+        return [render_receipt_pdf(data) for data in receipts]
+    try:
+        return list(_get_pool().map(render_receipt_pdf, receipts))
+    except BrokenProcessPool as e:
+        print("Receipt render pool failed, rendering in-process:", e)
+        _reset_pool()
+        return [render_receipt_pdf(data) for data in receipts]
+
+
+class _ZipStream:
+    """Write-only file object that hands out whatever zipfile wrote since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_receipts_zip(receipts):
+    """Yield a ZIP archive of the receipts' PDFs chunk by chunk."""
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for start in range(0, len(receipts), RECEIPT_BATCH_SLICE):
+            batch = receipts[start:start + RECEIPT_BATCH_SLICE]
+            pdfs = [_read_cached(data) for data in batch]
+            missing = [i for i, pdf in enumerate(pdfs) if pdf is None]
+            for i, pdf in zip(missing, _render_many([batch[i] for i in missing])):
+                pdfs[i] = pdf
+                _write_cached(batch[i], pdf)
+            for data, pdf in zip(batch, pdfs):
+                archive.writestr(receipt_filename(data), pdf)
+                yield stream.drain()
+    yield stream.drain()
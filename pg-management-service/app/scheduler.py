@@ -0,0 +1,194 @@
+"""Persistent background job scheduler, safe to run in every app process.
+
+Each registered job has a row in the scheduled_jobs table holding its interval,
+next run time and the outcome of its last run. Every process runs a scheduler
+thread that looks for due jobs; a job is claimed with a conditional UPDATE that
+takes a lease (locked_by / locked_until), so exactly one process runs each due
+job even under a multi-process server.
+
+The schedule survives restarts. A job whose run time passed while the app was
+down runs once when the scheduler next polls; the missed runs are coalesced
+into that run (and counted in missed_runs), and the job then keeps its
+original cadence.
+
+Environment variables:
+  SCHEDULER_POLL_SECONDS   longest sleep between checks for due jobs (default 30)
+  SCHEDULER_LEASE_SECONDS  how long a claimed job stays locked (default 3600); if a
+                           process dies mid-run, the job is released after this
+"""
+
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, or_
+from sqlalchemy.exc import IntegrityError
+
+from metrics import JOB_RUN_SECONDS
+from models import db, ScheduledJob
+
+SCHEDULER_POLL_SECONDS = int(os.getenv('SCHEDULER_POLL_SECONDS', '30'))
+SCHEDULER_LEASE_SECONDS = int(os.getenv('SCHEDULER_LEASE_SECONDS', '3600'))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# name -> (function, interval_seconds); functions run inside an app context
+JOBS = {}
+
+
+class JobFailed(Exception):
+    """Raised by a job that did its work but wants the run recorded as failed;
+    result is still handed back to the caller of run_job()."""
+
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+def register_job(name, func, interval_seconds):
+    JOBS[name] = (func, interval_seconds)
+
+
+def sync_jobs():
+    """Create rows for newly registered jobs and apply changed intervals."""
+    now = datetime.utcnow()
+    existing = {job.name: job for job in ScheduledJob.query.filter(ScheduledJob.name.in_(list(JOBS)))}
+    for name, (_, interval_seconds) in JOBS.items():
+        job = existing.get(name)
+        if job is None:
+            # New jobs run on the first poll
+            db.session.add(ScheduledJob(name=name, interval_seconds=interval_seconds, next_run_at=now))
+        elif job.interval_seconds != interval_seconds:
+            job.interval_seconds = interval_seconds
+            # Do not wait out the remainder of a longer, old interval
+            job.next_run_at = min(job.next_run_at,
+                                  (job.last_started_at or now) + timedelta(seconds=interval_seconds))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another process registered the jobs first
+        db.session.rollback()
+
+
+def claim_job(name, force=False):
+    """Take the lease on a job. Returns the lease token, or None if the job is
+    not due (unless force) or another process holds it."""
+    now = datetime.utcnow()
+    token = f"{WORKER_ID}:{uuid.uuid4().hex[:8]}"
+    conditions = [
+        ScheduledJob.name == name,
+        or_(ScheduledJob.locked_until.is_(None), ScheduledJob.locked_until < now),
+    ]
+    if not force:
+        conditions.append(ScheduledJob.next_run_at <= now)
+    claimed = ScheduledJob.query.filter(*conditions).update(
+        {"locked_by": token, "locked_until": now + timedelta(seconds=SCHEDULER_LEASE_SECONDS)},
+        synchronize_session=False
+    )
+    db.session.commit()
+    return token if claimed == 1 else None
+
+
+def run_job(name, force=False):
+    """Run a registered job if it is due (or right away with force) and this
+    process wins its lease. Returns (ran, result, error); error is None unless
+    the job raised, and result is then whatever it attached to JobFailed."""
+    func, _ = JOBS[name]
+    token = claim_job(name, force)
+    if token is None and db.session.get(ScheduledJob, name) is None:
+        # Scheduler thread not started in this deployment yet
+        sync_jobs()
+        token = claim_job(name, force)
+    if token is None:
+        return False, None, None
+
+    job = db.session.get(ScheduledJob, name)
+    scheduled_at = job.next_run_at
+    interval = timedelta(seconds=job.interval_seconds)
+
+    started = datetime.utcnow()
+    status, error, result = 'ok', None, None
+    try:
+        result = func()
+    except Exception as e:
+        db.session.rollback()
+        status, error = 'error', str(e)[:300]
+        result = getattr(e, 'result', None)
+        print(f"Scheduled job {name} failed:", e)
+    finished = datetime.utcnow()
+    JOB_RUN_SECONDS.observe((finished - started).total_seconds(), job=name, status=status)
+
+    if scheduled_at > started:
+        # Forced run ahead of schedule: keep the schedule as it is
+        missed, next_run_at = 0, scheduled_at
+    else:
+        # Keep the cadence; runs missed while no process was up are folded into this one
+        missed = (started - scheduled_at) // interval
+        next_run_at = scheduled_at + (missed + 1) * interval
+        if missed:
+            print(f"Scheduled job {name}: caught up {missed} missed run(s)")
+
+    ScheduledJob.query.filter_by(name=name, locked_by=token).update({
+        "last_started_at": started,
+        "last_finished_at": finished,
+        "last_duration_ms": int((finished - started).total_seconds() * 1000),
+        "last_status": status,
+        "last_error": error,
+        "run_count": ScheduledJob.run_count + 1,
+        "missed_runs": ScheduledJob.missed_runs + missed,
+        "next_run_at": next_run_at,
+        "locked_by": None,
+        "locked_until": None,
+    }, synchronize_session=False)
+    db.session.commit()
+    return True, result, error
+
+
+def run_due_jobs():
+    """Run every due job this process can claim; returns seconds until the next one is due."""
+    now = datetime.utcnow()
+    due = db.session.query(ScheduledJob.name) \
+        .filter(ScheduledJob.name.in_(list(JOBS)), ScheduledJob.next_run_at <= now) \
+        .order_by(ScheduledJob.next_run_at) \
+        .all()
+    for (name,) in due:
+        run_job(name)
+    now = datetime.utcnow()
+    # A job another process is running is not worth checking before its lease ends
+    wake_at = case((ScheduledJob.locked_until > now, ScheduledJob.locked_until),
+                   else_=ScheduledJob.next_run_at)
+    next_run_at = db.session.query(db.func.min(wake_at)) \
+        .filter(ScheduledJob.name.in_(list(JOBS))) \
+        .scalar()
+    db.session.commit()
+    if next_run_at is None:
+        return SCHEDULER_POLL_SECONDS
+    return (next_run_at - now).total_seconds()
+
+
+def scheduler_worker(app):
+    """Background loop: run due jobs, then sleep until the next one (at most the poll interval)."""
+    print("Job scheduler started:", ", ".join(f"{name} every {interval}s" for name, (_, interval) in JOBS.items()))
+    while True:
+        wait = SCHEDULER_POLL_SECONDS
+        try:
+            with app.app_context():
+                wait = run_due_jobs()
+        except Exception as e:
+            print("Error in job scheduler:", e)
+        time.sleep(min(max(wait, 1), SCHEDULER_POLL_SECONDS))
+
+
+def start_scheduler(app):
+    """Register the job rows and start the scheduler thread (daemon)."""
+    try:
+        with app.app_context():
+            sync_jobs()
+        thread = threading.Thread(target=scheduler_worker, args=(app,), daemon=True)
+        thread.start()
+        print("Job scheduler thread started")
+    except Exception as e:
+        print("Failed to start job scheduler:", e)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Deterministic Data Seeder for PG Management System
+
+Bulk-generates a realistic dataset of rooms, tenants (with their user
+accounts), monthly payments and complaints, so the list endpoints, /register,
+the reminder pass and the digest can be measured at production-like sizes
+(see load_bench.py).
+
+The same --seed, scale and --as-of always produce the same rows, ids
+included. Rows are written with batched Core INSERTs (--batch-size rows per
+statement), so even the large scale of about 500k payments takes seconds
+rather than minutes.
+
+Shape of the data:
+  - about 90% of the rooms are Occupied by a current tenant; the rest are Available
+  - the remaining tenants are past tenants without a room
+  - every tenant has --months consecutive monthly payments. A current tenant's
+    history ends in the --as-of month and the latest months are partly unpaid.
+    A past tenant's history ended earlier and is fully paid.
+  - current tenants' join dates are spread over the last two lease lengths
+    (LEASE_LENGTH_DAYS), so the reminder pass finds leases ending soon as
+    well as expired ones
+  - about one complaint per three tenants, in every status
+
+All seeded users get the password SEED_PASSWORD and emails ending in
+@seed.example.com. The database is the app's (DATABASE_URL, or database.db
+next to app.py) unless --database is given.
+
+Usage:
+  python3 seed_data.py --scale small
+  python3 seed_data.py --scale large --reset
+  python3 seed_data.py --rooms 300 --tenants 1000 --months 12 --database /tmp/bench.db
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+SEED_PASSWORD = 'tenant123'
+SEED_EMAIL_DOMAIN = 'seed.example.com'
+
+# rooms, tenants (current + past), months of payments per tenant
+SCALES = {
+    'small': {'rooms': 200, 'tenants': 400, 'months': 6},
+    'medium': {'rooms': 1000, 'tenants': 4000, 'months': 12},
+    'large': {'rooms': 5000, 'tenants': 20000, 'months': 25},  # 500k payments
+}
+
+OCCUPANCY = 0.9
+COMPLAINT_RATE = 0.33
+
+ROOM_TYPES = [('Single', 5000), ('Double', 8000), ('Triple', 12000), ('Suite', 60000)]
+ROOM_TYPE_WEIGHTS = [50, 30, 15, 5]
+FIRST_NAMES = ['Aarav', 'Aditi', 'Arjun', 'Divya', 'Ishaan', 'Kavya', 'Meera', 'Nikhil', 'Priya',
+               'Rahul', 'Rohan', 'Sanjana', 'Sneha', 'Tanvi', 'Varun', 'Vikram', 'Ananya', 'Karthik']
+LAST_NAMES = ['Sharma', 'Reddy', 'Iyer', 'Patel', 'Nair', 'Gupta', 'Rao', 'Menon', 'Das', 'Singh',
+              'Kumar', 'Joshi', 'Pillai', 'Mehta', 'Verma']
+CITIES = ['Hyderabad', 'Bengaluru', 'Chennai', 'Pune', 'Mumbai', 'Kochi', 'Vijayawada', 'Mysuru']
+COMPLAINT_CATEGORIES = ['Plumbing', 'Electrical', 'Cleaning', 'Internet', 'Furniture', 'Food', 'Security']
+COMPLAINT_DESCRIPTIONS = [
+    'Tap in the bathroom keeps leaking',
+    'Fan makes a loud noise at high speed',
+    'Room was not cleaned this week',
+    'Wi-Fi drops every evening',
+    'Cupboard door hinge is broken',
+    'Breakfast served cold',
+    'Main gate left open at night',
+]
+COMPLAINT_STATUSES = ['Pending', 'In Progress', 'Resolved', 'Resolved', 'Resolved']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk-generate a deterministic PG dataset")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small',
+                        help="preset sizes (default small); --rooms/--tenants/--months override it")
+    parser.add_argument('--rooms', type=int)
+    parser.add_argument('--tenants', type=int)
+    parser.add_argument('--months', type=int, help="payments per tenant")
+    parser.add_argument('--seed', type=int, default=42, help="random seed (default 42)")
+    parser.add_argument('--as-of', type=lambda s: datetime.strptime(s, '%Y-%m-%d').date(), default=date.today(),
+                        help="YYYY-MM-DD the data is current as of (default today)")
+    parser.add_argument('--batch-size', type=int, default=5000, help="rows per INSERT (default 5000)")
+    parser.add_argument('--database', help="SQLite file to seed instead of the app's database")
+    parser.add_argument('--reset', action='store_true', help="drop and recreate all tables first")
+    args = parser.parse_args()
+    for key, value in SCALES[args.scale].items():
+        if getattr(args, key) is None:
+            setattr(args, key, value)
+    return args
+
+
+def month_starts(last_month, count):
+    """The first day of count consecutive months ending with last_month, oldest first."""
+    months = []
+    year, month = last_month.year, last_month.month
+    for _ in range(count):
+        months.append(date(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months[::-1]
+
+
+def generate(spec, first_ids, password_hash, lease_days):
+    """Yield (table name, rows) for the whole dataset, in insert order.
+    spec carries rooms, tenants, months, seed and as_of, like the parsed arguments."""
+    rng = random.Random(spec.seed)
+    room_id, user_id, tenant_id, payment_id, complaint_id = first_ids
+    current = min(int(spec.rooms * OCCUPANCY), spec.tenants)
+
+    rooms = []
+    for i in range(spec.rooms):
+        room_type, rent = rng.choices(ROOM_TYPES, ROOM_TYPE_WEIGHTS)[0]
+        rooms.append({"id": room_id + i, "room_no": f"R{i + 1:05d}", "room_type": room_type,
+                      "rent": rent, "status": "Occupied" if i < current else "Available"})
+    yield 'rooms', rooms
+
+    users, tenants, payments, complaints = [], [], [], []
+    as_of_month = spec.as_of.replace(day=1)
+    for i in range(spec.tenants):
+        is_current = i < current
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        users.append({"id": user_id + i, "email": f"tenant{i + 1:06d}@{SEED_EMAIL_DOMAIN}",
+                      "password": password_hash, "role": "TENANT"})
+        if is_current:
+            join_date = spec.as_of - timedelta(days=rng.randrange(2 * lease_days))
+            last_month = as_of_month
+        else:
+            # Moved out between one month and three years ago
+            last_month = month_starts(as_of_month, rng.randrange(2, 37))[0]
+            join_date = month_starts(last_month, spec.months)[0]
+        tenants.append({"id": tenant_id + i, "user_id": user_id + i, "name": name,
+                        "phone": f"9{rng.randrange(10 ** 9):09d}", "join_date": join_date,
+                        "room_id": room_id + i if is_current else None,
+                        "address": f"{rng.randrange(1, 999)} Main Road, {rng.choice(CITIES)}",
+                        "id_info": f"AADHAAR-{rng.randrange(10 ** 12):012d}"})
+
+        rent = rooms[i]["rent"] if is_current else rng.choice(ROOM_TYPES)[1]
+        months = month_starts(last_month, spec.months)
+        for age, month in enumerate(reversed(months)):
+            # Current tenants: this month is often unpaid, older months rarely
+            unpaid_odds = (0.6 if age == 0 else 0.15 if age == 1 else 0.02) if is_current else 0
+            payments.append({"id": payment_id + len(payments), "tenant_id": tenant_id + i,
+                             "month": month.strftime('%b %Y'), "amount": rent,
+                             "paid": rng.random() >= unpaid_odds, "due_date": month + timedelta(days=4)})
+
+        if rng.random() < COMPLAINT_RATE:
+            complaints.append({"id": complaint_id + len(complaints), "tenant_id": tenant_id + i,
+                               "category": rng.choice(COMPLAINT_CATEGORIES),
+                               "description": rng.choice(COMPLAINT_DESCRIPTIONS),
+                               "status": rng.choice(COMPLAINT_STATUSES) if is_current else "Resolved"})
+    yield 'users', users
+    yield 'tenants', tenants
+    yield 'payments', payments
+    yield 'complaints', complaints
+
+
+def seed(db, spec, batch_size=5000, log=print):
+    """Insert the dataset described by spec into db (inside an app context).
+    Ids continue after the rows already there. Returns {table: rows inserted}."""
+    from models import User, Room, Tenant, Payment, Complaint
+    from passwords import hash_password
+
+    tables = {"rooms": Room, "users": User, "tenants": Tenant, "payments": Payment, "complaints": Complaint}
+    lease_days = int(os.getenv('LEASE_LENGTH_DAYS', '30'))
+    # Ids follow whatever is there already (e.g. the sample rooms and users)
+    first_ids = [(db.session.query(db.func.max(model.id)).scalar() or 0) + 1
+                 for model in (Room, User, Tenant, Payment, Complaint)]
+    password_hash = hash_password(SEED_PASSWORD)
+
+    counts = {}
+    for name, rows in generate(spec, first_ids, password_hash, lease_days):
+        table_started = time.perf_counter()
+        statement = tables[name].__table__.insert()
+        for start in range(0, len(rows), batch_size):
+            db.session.execute(statement, rows[start:start + batch_size])
+        db.session.commit()
+        counts[name] = len(rows)
+        if log:
+            log(f"  {name:<11}{len(rows):>9,} rows  {time.perf_counter() - table_started:7.2f}s")
+    return counts
+
+
+def main():
+    args = parse_args()
+    if args.database:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.abspath(args.database)}"
+
+    from app import app, db, init_sample_data
+    from models import User
+
+    print("=" * 70)
+    print("PG Management System - Data Seeder")
+    print("=" * 70)
+    print(f"Scale: {args.rooms} rooms, {args.tenants} tenants, {args.months} months "
+          f"(seed {args.seed}, as of {args.as_of})")
+
+    started = time.perf_counter()
+    with app.app_context():
+        if args.reset:
+            print("Dropping and recreating all tables...")
+            db.drop_all()
+        db.create_all()
+        init_sample_data()
+        if User.query.filter(User.email.like(f'%@{SEED_EMAIL_DOMAIN}')).first() is not None:
+            print("❌ Database already holds seeded data; run again with --reset")
+            sys.exit(1)
+        seed(db, args, args.batch_size)
+
+    print("=" * 70)
+    print(f"✅ Seeded in {time.perf_counter() - started:.1f}s; tenant logins use password '{SEED_PASSWORD}'")
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""Opt-in slow-query log with EXPLAIN capture.
+
+With SLOW_QUERY_MS set, register_slow_query_log(engine) times every SQL
+statement. Any statement at or above the threshold is printed together with
+its bound parameters, the route that issued it and its query plan (EXPLAIN
+QUERY PLAN, run on the same connection right after the statement).
+
+Findings are aggregated by normalized statement: literals and bound values
+become "?" and IN lists collapse to "IN (?...)", so the same query with
+different arguments counts as one offender. For each one we keep the count,
+total and max time, the routes that issued it, and the parameters and plan of
+its slowest run. Plans that read a whole table are flagged (full_scan), the
+same check check_query_plans.py runs on the known hot queries. GET
+/admin/slow-queries lists the worst offenders.
+
+The plan is only captured on SQLite. On other databases a failed EXPLAIN
+would abort the surrounding transaction, so there the statement is logged
+and aggregated without a plan. A plan is captured again only when a
+statement runs slower than before, so a hot query is not explained on every
+run.
+
+Environment variables:
+  SLOW_QUERY_MS              threshold in milliseconds; unset (default) disables the log
+  SLOW_QUERY_EXPLAIN         capture query plans (default true)
+  SLOW_QUERY_LOG_PARAMS      include bound parameters in the log (default true)
+  SLOW_QUERY_MAX_STATEMENTS  distinct statements kept; the cheapest are dropped (default 200)
+"""
+
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import event
+
+from metrics import current_route
+
+SLOW_QUERY_MS = os.getenv('SLOW_QUERY_MS', '').strip()
+SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'true').lower() in ('1', 'true', 'yes')
+SLOW_QUERY_LOG_PARAMS = os.getenv('SLOW_QUERY_LOG_PARAMS', 'true').lower() in ('1', 'true', 'yes')
+SLOW_QUERY_MAX_STATEMENTS = int(os.getenv('SLOW_QUERY_MAX_STATEMENTS', '200'))
+
+# "SCAN payments" / "SCAN TABLE payments" (older SQLite) is a full table scan;
+# "SCAN payments USING INDEX ..." walks an index and is fine.
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+( AS \w+)?$')
+
+# Only statements with a plan worth reading; skips PRAGMA, BEGIN, plain INSERT ... VALUES
+_EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE)\b', re.IGNORECASE)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|:\w+|\$\d+|\?')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+_PARAMS_MAX_CHARS = 300
+
+
+def normalize_statement(statement):
+    """statement with literals and placeholders as "?", IN lists collapsed and whitespace squeezed."""
+    sql = _STRING_LITERAL.sub('?', statement)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (?...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def _format_params(parameters, executemany):
+    if not SLOW_QUERY_LOG_PARAMS:
+        return None
+    if executemany:
+        text = f"{len(parameters)} rows, first {parameters[0]!r}" if parameters else '[]'
+    else:
+        text = repr(parameters)
+    return text if len(text) <= _PARAMS_MAX_CHARS else text[:_PARAMS_MAX_CHARS] + '...'
+
+
+def explain(conn, statement, parameters, executemany):
+    """Plan lines of statement, or None when it cannot or should not be explained."""
+    if not SLOW_QUERY_EXPLAIN or conn.dialect.name != 'sqlite' or not _EXPLAINABLE.match(statement):
+        return None
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+    # A raw DB-API cursor: no engine events fire, so this is not timed or logged itself
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """Slow statements aggregated by normalized text (thread-safe)."""
+
+    def __init__(self, max_statements):
+        self.max_statements = max_statements
+        self._findings = {}
+        self._lock = threading.Lock()
+
+    def needs_plan(self, key, elapsed_ms):
+        """True unless we already hold a plan for a run at least this slow."""
+        with self._lock:
+            finding = self._findings.get(key)
+            return finding is None or elapsed_ms > finding["max_ms"]
+
+    def record(self, key, elapsed_ms, route, params, plan):
+        now = datetime.utcnow().isoformat(timespec='seconds')
+        with self._lock:
+            finding = self._findings.get(key)
+            if finding is None:
+                if len(self._findings) >= self.max_statements:
+                    cheapest = min(self._findings, key=lambda k: self._findings[k]["total_ms"])
+                    del self._findings[cheapest]
+                finding = self._findings[key] = {
+                    "statement": key, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "first_seen": now, "routes": {}, "slowest": None, "full_scan": False,
+                }
+            finding["count"] += 1
+            finding["total_ms"] += elapsed_ms
+            finding["last_seen"] = now
+            finding["routes"][route] = finding["routes"].get(route, 0) + 1
+            if elapsed_ms > finding["max_ms"]:
+                finding["max_ms"] = elapsed_ms
+                finding["slowest"] = {"ms": round(elapsed_ms, 2), "route": route, "params": params,
+                                      "plan": plan, "at": now}
+                if plan is not None:
+                    finding["full_scan"] = any(FULL_SCAN.match(line) for line in plan)
+
+    def worst(self, limit=20, sort='total'):
+        """Up to limit findings, worst first by sort ("total", "max" or "count")."""
+        sort_key = {"total": "total_ms", "max": "max_ms", "count": "count"}[sort]
+        with self._lock:
+            findings = sorted(self._findings.values(), key=lambda f: f[sort_key], reverse=True)[:limit]
+            return [dict(f, total_ms=round(f["total_ms"], 2), max_ms=round(f["max_ms"], 2),
+                         avg_ms=round(f["total_ms"] / f["count"], 2), routes=dict(f["routes"]))
+                    for f in findings]
+
+    def clear(self):
+        with self._lock:
+            self._findings.clear()
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_MAX_STATEMENTS)
+
+
+def slow_query_threshold_ms():
+    """Configured threshold in milliseconds, or None when the log is off."""
+    return float(SLOW_QUERY_MS) if SLOW_QUERY_MS else None
+
+
+def register_slow_query_log(engine):
+    """Log and aggregate statements on engine slower than SLOW_QUERY_MS. No-op when unset."""
+    threshold_ms = slow_query_threshold_ms()
+    if threshold_ms is None:
+        return
+    print(f"Slow-query log enabled: statements over {threshold_ms:g} ms")
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _check_statement(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_slow_query_started', None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms < threshold_ms:
+            return
+        key = normalize_statement(statement)
+        route = current_route()
+        params = _format_params(parameters, executemany)
+        plan = explain(conn, statement, parameters, executemany) if slow_query_log.needs_plan(key, elapsed_ms) else None
+        slow_query_log.record(key, elapsed_ms, route, params, plan)
+
+        print(f"Slow query ({elapsed_ms:.1f} ms) on {route}: {_WHITESPACE.sub(' ', statement).strip()}")
+        if params is not None:
+            print(f"    params: {params}")
+        for line in plan or ():
+            print(f"    plan: {line}")
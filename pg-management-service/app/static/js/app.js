@@ -6,6 +6,8 @@ let roomsList = [];
 let tenantsList = [];
 let paymentsList = [];
 let complaintsList = [];
+// Rows per GET /payments or /complaints request (the server caps it at MAX_PAGE_SIZE)
+const PAGE_SIZE = 100;
 
 // Lightweight alert helper used by the UI. Appends a dismissible alert to #alertContainer.
 function showAlert(message, type='info', timeout=4000) {
@@ -27,6 +29,31 @@ function showAlert(message, type='info', timeout=4000) {
     }
 }
 
+// Last response body and ETag per GET URL. Requests send If-None-Match, and a
+// 304 is answered from here instead of re-downloading.
+const validatorCache = new Map();
+
+async function fetchWithValidators(url, options = {}) {
+    const cached = validatorCache.get(url);
+    const headers = new Headers(options.headers || {});
+    if (cached) headers.set('If-None-Match', cached.etag);
+    // no-store: let this function, not the browser cache, handle the 304
+    const response = await fetch(url, { ...options, headers, cache: 'no-store' });
+
+    if (response.status === 304 && cached) {
+        return new Response(cached.body, { status: 200, headers: cached.headers });
+    }
+    const etag = response.headers.get('ETag');
+    if (response.ok && etag) {
+        validatorCache.set(url, {
+            etag,
+            body: await response.clone().text(),
+            headers: new Headers(response.headers)
+        });
+    }
+    return response;
+}
+
 // Initialize
 document.addEventListener('DOMContentLoaded', function() {
     const loginForm = document.getElementById('loginForm');
@@ -111,7 +138,7 @@ function showRegisterModal() {
 
 async function loadAvailableRoomsForRegistration() {
     try {
-        const response = await fetch(`${API_URL}/rooms`, {
+        const response = await fetchWithValidators(`${API_URL}/rooms`, {
             credentials: 'include'
         });
         const data = await response.json();
@@ -222,7 +249,7 @@ async function registerTenant() {
         } else {
             // If current-user endpoint doesn't exist, query all users and find the one we just created
             console.log('current-user endpoint not available, fetching all users');
-            const allUsersResponse = await fetch(`${API_URL}/users`, {
+            const allUsersResponse = await fetchWithValidators(`${API_URL}/users`, {
                 credentials: 'include'
             });
             if (allUsersResponse.ok) {
@@ -299,6 +326,7 @@ async function registerTenant() {
 
 // ============ LOGOUT ============
 function logout() {
+    validatorCache.clear();
     localStorage.removeItem('currentUser');
     currentUser = null;
     location.reload();
@@ -369,28 +397,27 @@ function showSection(section) {
 // ============ DASHBOARD ============
 async function loadDashboard() {
     try {
-        const roomsResp = await fetch(`${API_URL}/rooms`, { credentials: 'include' });
-        const rooms = await roomsResp.json();
-        document.getElementById('totalRooms').textContent = rooms.length;
-
-        const tenantsResp = await fetch(`${API_URL}/tenants`, { credentials: 'include' });
-        const tenants = await tenantsResp.json();
-        document.getElementById('totalTenants').textContent = tenants.length;
+        // All dashboard counters come from one aggregate endpoint
+        const statsResp = await fetchWithValidators(`${API_URL}/dashboard/stats`, { credentials: 'include' });
+        const stats = await statsResp.json();
+        document.getElementById('totalRooms').textContent = stats.rooms.total;
+        document.getElementById('totalTenants').textContent = stats.tenants;
+        document.getElementById('pendingPayments').textContent = stats.pending_payments.count;
+        document.getElementById('openComplaints').textContent = stats.open_complaints.total;
 
         // If the current user is a TENANT, show their due date in the dashboard card
         try {
             if (currentUser && currentUser.role === 'TENANT') {
-                // Match by user_id if available, otherwise fallback to matching by email
-                const myTenant = tenants.find(t => (currentUser.id && t.user_id === currentUser.id) || (currentUser.email && t.email === currentUser.email));
+                const hasTenancy = stats.my_end_date && stats.my_end_date !== 'N/A';
                 const dueElem = document.getElementById('tenantDueDate');
                 if (dueElem) {
-                    dueElem.textContent = myTenant ? (myTenant.end_date || 'N/A') : 'N/A';
+                    dueElem.textContent = stats.my_end_date || 'N/A';
                 }
                 // Ensure the tenant-only row is visible when a tenant is present
                 try {
                     const tenantRow = document.querySelector('.tenant-only');
                     if (tenantRow) {
-                        tenantRow.style.display = (myTenant ? 'flex' : 'none');
+                        tenantRow.style.display = (hasTenancy ? 'flex' : 'none');
                     }
                 } catch (e) {
                     // ignore
@@ -409,15 +436,6 @@ async function loadDashboard() {
                 console.error('Error fetching admin summaries:', e);
             }
         }
-
-        const paymentsResp = await fetch(`${API_URL}/payments`, { credentials: 'include' });
-        const payments = await paymentsResp.json();
-        const pendingCount = payments.filter(p => !p.paid).length;
-        document.getElementById('pendingPayments').textContent = pendingCount;
-
-        const complaintsResp = await fetch(`${API_URL}/complaints`, { credentials: 'include' });
-        const complaints = await complaintsResp.json();
-        document.getElementById('openComplaints').textContent = complaints.length;
     } catch (error) {
         console.error('Dashboard load error:', error);
         showAlert('Error loading dashboard', 'danger');
@@ -427,7 +445,7 @@ async function loadDashboard() {
 // Fetch admin reminder summary and populate the dashboard card
 async function fetchReminderSummary() {
     try {
-        const resp = await fetch(`${API_URL}/admin/reminder-summary`, { credentials: 'include' });
+        const resp = await fetchWithValidators(`${API_URL}/admin/reminder-summary`, { credentials: 'include' });
         if (!resp.ok) {
             console.error('Reminder summary request failed', resp.status);
             return;
@@ -455,7 +473,7 @@ async function fetchReminderSummary() {
 // Fetch admin payment summary and populate the payment dashboard card
 async function fetchPaymentSummary() {
     try {
-        const resp = await fetch(`${API_URL}/admin/payment-summary`, { credentials: 'include' });
+        const resp = await fetchWithValidators(`${API_URL}/admin/payment-summary`, { credentials: 'include' });
         if (!resp.ok) {
             console.error('Payment summary request failed', resp.status);
             return;
@@ -526,7 +544,7 @@ async function saveRoom() {
 
 async function loadRooms() {
     try {
-        const response = await fetch(`${API_URL}/rooms`, { credentials: 'include' });
+        const response = await fetchWithValidators(`${API_URL}/rooms`, { credentials: 'include' });
         const rooms = await response.json();
         roomsList = rooms;
 
@@ -565,7 +583,7 @@ function showAddTenantModal() {
 
 async function loadRoomsForTenant() {
     try {
-        const response = await fetch(`${API_URL}/rooms`, { credentials: 'include' });
+        const response = await fetchWithValidators(`${API_URL}/rooms`, { credentials: 'include' });
         const rooms = await response.json();
         const roomSelect = document.getElementById('roomSelect');
         roomSelect.innerHTML = '<option value="">Select a Room</option>';
@@ -626,7 +644,7 @@ async function saveTenant() {
 
 async function loadTenants() {
     try {
-        const response = await fetch(`${API_URL}/tenants`, { credentials: 'include' });
+        const response = await fetchWithValidators(`${API_URL}/tenants`, { credentials: 'include' });
         const tenants = await response.json();
         tenantsList = tenants;
 
@@ -655,45 +673,49 @@ async function loadTenants() {
 // ============ PAYMENTS ============
 async function loadPayments() {
     try {
-        const response = await fetch(`${API_URL}/payments`, { credentials: 'include' });
-        const payments = await response.json();
-        paymentsList = payments;
-
         const tbody = document.getElementById('paymentsTableBody');
         tbody.innerHTML = '';
-
-        // Get tenants info for display
-        const tenantsResp = await fetch(`${API_URL}/tenants`, { credentials: 'include' });
-        const tenants = await tenantsResp.json();
-        const tenantMap = {};
-        tenants.forEach(t => tenantMap[t.id] = t);
-
-        payments.forEach(payment => {
-            const tenant = tenantMap[payment.tenant_id] || {};
-            const row = document.createElement('tr');
-            const statusBadge = payment.paid ? '<span class="badge bg-success">PAID</span>' : '<span class="badge bg-warning">PENDING</span>';
-            row.innerHTML = `
-                <td>${tenant.name || 'N/A'}</td>
-                <td>${tenant.email || 'N/A'}</td>
-                <td>${tenant.phone || 'N/A'}</td>
-                <td>Room ${tenant.room_no || 'N/A'} (${tenant.room_type || 'N/A'})</td>
-                <td>${payment.month}</td>
-                <td>₹${payment.amount || 0}</td>
-                <td>${statusBadge}</td>
-            `;
-            tbody.appendChild(row);
-        });
+        paymentsList = [];
+
+        // GET /payments is paginated: follow X-Next-Cursor, rendering each page as it arrives
+        let cursor = null;
+        do {
+            const url = `${API_URL}/payments?limit=${PAGE_SIZE}` + (cursor ? `&after=${cursor}` : '');
+            const response = await fetchWithValidators(url, { credentials: 'include' });
+            const payments = await response.json();
+            paymentsList = paymentsList.concat(payments);
+            cursor = response.headers.get('X-Next-Cursor');
+            renderPaymentRows(tbody, payments);
+        } while (cursor);
     } catch (error) {
         console.error('Load payments error:', error);
         showAlert('Error loading payments', 'danger');
     }
 }
 
+function renderPaymentRows(tbody, payments) {
+    // Tenant and room details are joined server-side by GET /payments
+    payments.forEach(payment => {
+        const row = document.createElement('tr');
+        const statusBadge = payment.paid ? '<span class="badge bg-success">PAID</span>' : '<span class="badge bg-warning">PENDING</span>';
+        row.innerHTML = `
+            <td>${payment.tenant_name || 'N/A'}</td>
+            <td>${payment.tenant_email || 'N/A'}</td>
+            <td>${payment.tenant_phone || 'N/A'}</td>
+            <td>Room ${payment.room_no || 'N/A'} (${payment.room_type || 'N/A'})</td>
+            <td>${payment.month}</td>
+            <td>₹${payment.amount || 0}</td>
+            <td>${statusBadge}</td>
+        `;
+        tbody.appendChild(row);
+    });
+}
+
 // Load tenant's own payments
 async function loadTenantPayments() {
     try {
         // Get current tenant's ID
-        const tenantsResp = await fetch(`${API_URL}/tenants`, { credentials: 'include' });
+        const tenantsResp = await fetchWithValidators(`${API_URL}/tenants`, { credentials: 'include' });
         const tenants = await tenantsResp.json();
         const currentTenant = tenants.find(t => t.user_id === currentUser.id);
 
@@ -703,7 +725,7 @@ async function loadTenantPayments() {
         }
 
         // Get tenant's payments
-        const paymentsResp = await fetch(`${API_URL}/tenants/${currentTenant.id}/payments`, { credentials: 'include' });
+        const paymentsResp = await fetchWithValidators(`${API_URL}/tenants/${currentTenant.id}/payments`, { credentials: 'include' });
         const payments = await paymentsResp.json();
 
         const tbody = document.getElementById('tenantPaymentsTableBody');
@@ -807,22 +829,12 @@ async function saveComplaint() {
     }
 
     try {
-        // Get current tenant ID
-        const tenantsResp = await fetch(`${API_URL}/tenants`, { credentials: 'include' });
-        const tenants = await tenantsResp.json();
-        const currentTenant = tenants.find(t => t.user_id === currentUser.id);
-
-        if (!currentTenant) {
-            showAlert('You must be a tenant to file a complaint', 'danger');
-            return;
-        }
-
+        // The server files the complaint against the logged-in tenant's record
         const response = await fetch(`${API_URL}/complaints`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             credentials: 'include',
             body: JSON.stringify({
-                tenant_id: currentTenant.id,
                 category: category,
                 description: description
             })
@@ -832,6 +844,8 @@ async function saveComplaint() {
             showAlert('Complaint submitted successfully', 'success');
             bootstrap.Modal.getInstance(document.getElementById('addComplaintModal')).hide();
             loadComplaints();
+        } else if (response.status === 404) {
+            showAlert('You must be a tenant to file a complaint', 'danger');
         } else {
             const data = await response.json();
             showAlert(data.message || 'Failed to submit complaint', 'danger');
@@ -844,35 +858,39 @@ async function saveComplaint() {
 
 async function loadComplaints() {
     try {
-        const response = await fetch(`${API_URL}/complaints`, { credentials: 'include' });
-        const complaints = await response.json();
-        complaintsList = complaints;
-
         const tbody = document.getElementById('complaintsTableBody');
         tbody.innerHTML = '';
-
-        // Get tenants for mapping
-        const tenantsResp = await fetch(`${API_URL}/tenants`, { credentials: 'include' });
-        const tenants = await tenantsResp.json();
-        const tenantMap = {};
-        tenants.forEach(t => tenantMap[t.id] = t.name);
-
-        complaints.forEach(complaint => {
-            const row = document.createElement('tr');
-            row.innerHTML = `
-                <td>${tenantMap[complaint.tenant_id] || 'N/A'}</td>
-                <td>${complaint.category}</td>
-                <td>${complaint.description}</td>
-                <td><span class="badge bg-info">${complaint.status}</span></td>
-            `;
-            tbody.appendChild(row);
-        });
+        complaintsList = [];
+
+        // GET /complaints is paginated like GET /payments
+        let cursor = null;
+        do {
+            const url = `${API_URL}/complaints?limit=${PAGE_SIZE}` + (cursor ? `&after=${cursor}` : '');
+            const response = await fetchWithValidators(url, { credentials: 'include' });
+            const complaints = await response.json();
+            complaintsList = complaintsList.concat(complaints);
+            cursor = response.headers.get('X-Next-Cursor');
+            renderComplaintRows(tbody, complaints);
+        } while (cursor);
     } catch (error) {
         console.error('Load complaints error:', error);
         showAlert('Error loading complaints', 'danger');
     }
 }
 
+function renderComplaintRows(tbody, complaints) {
+    complaints.forEach(complaint => {
+        const row = document.createElement('tr');
+        row.innerHTML = `
+            <td>${complaint.tenant_name || 'N/A'}</td>
+            <td>${complaint.category}</td>
+            <td>${complaint.description}</td>
+            <td><span class="badge bg-info">${complaint.status}</span></td>
+        `;
+        tbody.appendChild(row);
+    });
+}
+
 // ============ ADMIN HELPERS ============
 async function sendTestEmail() {
     if (!currentUser || currentUser.role !== 'ADMIN') {
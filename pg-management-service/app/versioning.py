@@ -0,0 +1,141 @@
+"""Per-table version counters and HTTP conditional GET.
+
+Every INSERT, UPDATE or DELETE on a tracked table is noticed at the cursor
+level, whether it came from the ORM, a bulk Query.update or a Core statement.
+When the transaction commits, the counters of the tables it wrote to are
+bumped in table_versions, in the same transaction, so a rollback leaves them
+alone.
+
+@conditional_get(*tables) reads those counters (one small primary-key query)
+and builds a weak ETag from them, the request URL, the logged-in identity and
+today's date. A matching If-None-Match is answered with 304 before the view's
+own queries run.
+
+No Last-Modified is sent. The newest table write cannot stand in for the
+ETag: the same URL changes when another user logs in or the date rolls over,
+with no write at all, so If-Modified-Since alone would get a stale 304.
+"""
+
+import hashlib
+import re
+from datetime import date, datetime
+from functools import wraps
+
+from flask import current_app, make_response, request
+from flask_login import current_user
+from sqlalchemy import event, insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from werkzeug.http import is_resource_modified
+
+from models import db, TableVersion
+
+VERSIONED_TABLES = ('users', 'rooms', 'tenants', 'payments', 'complaints')
+
+_WRITE_STATEMENT = re.compile(
+    r'^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+["`\[]?(\w+)',
+    re.IGNORECASE
+)
+
+
+def register_table_versioning(engine):
+    """Track writes to VERSIONED_TABLES on engine and bump their counters on commit.
+    Creates and seeds table_versions first, since every commit now touches it."""
+    TableVersion.__table__.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        existing = {name for (name,) in conn.execute(select(TableVersion.name))}
+        missing = [name for name in VERSIONED_TABLES if name not in existing]
+        if missing:
+            conn.execute(insert(TableVersion), [
+                {"name": name, "version": 1, "updated_at": datetime.utcnow()} for name in missing
+            ])
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _track_write(conn, cursor, statement, parameters, context, executemany):
+        match = _WRITE_STATEMENT.match(statement)
+        if match and match.group(1).lower() in VERSIONED_TABLES:
+            conn.info.setdefault('written_tables', set()).add(match.group(1).lower())
+
+    @event.listens_for(engine, 'commit')
+    def _bump_versions(conn):
+        tables = conn.info.pop('written_tables', None)
+        if not tables:
+            return
+        # Names come from VERSIONED_TABLES and the timestamp is ours, so inlining is safe
+        # and avoids depending on the driver's parameter style
+        now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
+        names = ', '.join(f"'{name}'" for name in sorted(tables))
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(
+                f"UPDATE table_versions SET version = version + 1, updated_at = '{now}' "
+                f"WHERE name IN ({names})"
+            )
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, 'rollback')
+    def _forget_writes(conn):
+        conn.info.pop('written_tables', None)
+
+
+def seed_table_versions(names):
+    """Create missing counter rows (another process may race us; that is fine)."""
+    db.session.add_all([TableVersion(name=name, version=1, updated_at=datetime.utcnow()) for name in names])
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+
+
+def table_etag(tables):
+    """ETag for the current request over tables, or None if unavailable."""
+    query = db.session.query(TableVersion.name, TableVersion.version).filter(TableVersion.name.in_(tables))
+    try:
+        rows = query.all()
+        missing = set(tables) - {row.name for row in rows}
+        if missing:
+            seed_table_versions(missing)
+            rows = query.all()
+            if len(rows) != len(set(tables)):
+                return None
+    except SQLAlchemyError as e:
+        # e.g. the table_versions table has not been created yet
+        print('Conditional GET disabled:', e)
+        db.session.rollback()
+        return None
+
+    identity = current_user.get_id() if current_user.is_authenticated else 'anonymous'
+    versions = ','.join(f"{row.name}:{row.version}" for row in sorted(rows))
+    key = f"{request.full_path}|{identity}|{date.today()}|{versions}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _set_validators(response, etag):
+    response.set_etag(etag, weak=True)
+    # Per-user data: browsers may keep it but must revalidate every time
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+
+
+def conditional_get(*tables):
+    """Decorator for GET views whose output depends only on tables (plus the
+    URL, the user and today's date). Place it below @login_required."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = table_etag(tables)
+            if etag is None:
+                return view(*args, **kwargs)
+            if not is_resource_modified(request.environ, etag=etag):
+                response = current_app.response_class(status=304)
+                _set_validators(response, etag)
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _set_validators(response, etag)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for room allocation in /register.
+
+Creates a batch of fresh rooms as admin, fires hundreds of parallel tenant
+registrations at them, then checks that:
+  - no room ended up with more than one tenant
+  - every successful registration got a room, and every room was claimed at most once
+  - failed registrations left no orphan user accounts behind
+
+Start the app first (cd app && python3 app.py), then run:
+  python3 stress_register.py [--base-url http://localhost:8000] [--rooms 20] [--registrations 300] [--workers 50]
+
+Exit code is 0 when no room was double-booked, 1 otherwise.
+"""
+
+import argparse
+import http.cookiejar
+import json
+import random
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ADMIN_EMAIL = 'admin@pg.com'
+ADMIN_PASSWORD = 'admin123'
+
+def make_client():
+    """urllib opener with its own cookie jar (one login session per client)."""
+    return urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+def call(client, base_url, method, path, payload=None):
+    """Send a JSON request and return (status, parsed body)."""
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    try:
+        with client.open(req, timeout=60) as resp:
+            return resp.status, json.loads(resp.read() or b'null')
+    except urllib.error.HTTPError as e:
+        body = e.read()
+        try:
+            return e.code, json.loads(body)
+        except ValueError:
+            return e.code, body.decode(errors='replace')
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel /register stress test")
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--rooms', type=int, default=20)
+    parser.add_argument('--registrations', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=50)
+    args = parser.parse_args()
+    base_url = args.base_url.rstrip('/')
+
+    print("=" * 70)
+    print("PG Management - Room Allocation Stress Test")
+    print("=" * 70)
+
+    admin = make_client()
+    status, body = call(admin, base_url, 'POST', '/login', {'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})
+    if status != 200:
+        print(f"❌ Admin login failed ({status}): {body}")
+        print("   Is the app running at", base_url, "?")
+        sys.exit(1)
+
+    # Fresh rooms so earlier runs do not interfere
+    run_id = int(time.time())
+    room_nos = [f"S{run_id}-{i}" for i in range(args.rooms)]
+    for room_no in room_nos:
+        status, body = call(admin, base_url, 'POST', '/rooms',
+                            {'room_no': room_no, 'room_type': 'Single', 'rent': 1000, 'status': 'Available'})
+        if status != 200:
+            print(f"❌ Could not create room {room_no} ({status}): {body}")
+            sys.exit(1)
+    _, rooms = call(admin, base_url, 'GET', '/rooms')
+    room_ids = [r['id'] for r in rooms if r['room_no'] in room_nos]
+    _, users_before = call(admin, base_url, 'GET', '/users?fields=id')
+    print(f"Created {len(room_ids)} rooms, sending {args.registrations} registrations "
+          f"with {args.workers} workers...")
+
+    def register(i):
+        payload = {
+            'email': f"stress{run_id}-{i}@example.com",
+            'password': 'stress123',
+            'name': f"Stress {i}",
+            'phone': '0000000000',
+            'room_id': random.choice(room_ids),
+            'role': 'TENANT',
+        }
+        return call(make_client(), base_url, 'POST', '/register', payload)
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(register, range(args.registrations)))
+    elapsed = time.time() - started
+
+    outcomes = Counter(status for status, _ in results)
+    created = sum(1 for status, _ in results if status == 201)
+    print(f"Done in {elapsed:.2f}s - responses by status: {dict(outcomes)}")
+
+    _, tenants = call(admin, base_url, 'GET', '/tenants?fields=id,room_id')
+    _, users_after = call(admin, base_url, 'GET', '/users?fields=id')
+    per_room = Counter(t['room_id'] for t in tenants if t['room_id'] in room_ids)
+    double_booked = {room_id: n for room_id, n in per_room.items() if n > 1}
+    new_users = len(users_after) - len(users_before)
+
+    failures = []
+    if double_booked:
+        failures.append(f"rooms with more than one tenant: {double_booked}")
+    if created != len(per_room):
+        failures.append(f"{created} successful registrations but {len(per_room)} rooms occupied")
+    if created > len(room_ids):
+        failures.append(f"{created} registrations succeeded for only {len(room_ids)} rooms")
+    if new_users != created:
+        failures.append(f"{new_users} users created for {created} successful registrations (orphans)")
+    if outcomes.get(500):
+        failures.append(f"{outcomes[500]} registrations failed with a server error")
+
+    print("=" * 70)
+    if failures:
+        for failure in failures:
+            print("❌", failure)
+        sys.exit(1)
+    print(f"✅ {created} rooms allocated, none double-booked, no orphan users")
+    sys.exit(0)
+
+if __name__ == '__main__':
+    main()